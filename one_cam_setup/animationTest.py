@@ -2,15 +2,63 @@ from vedo import *
 import json
 import numpy as np
 import time
+from recording import RecordingReader
+
+# Cadence supposée des enregistrements JSON, qui n'ont pas de temps de capture
+JSON_FPS = 30.0
+
+# Vitesses de lecture disponibles (touches +/-)
+PLAYBACK_SPEEDS = [0.25, 0.5, 1.0, 2.0, 4.0]
+
+
+def load_animation_tensor(filename):
+    """
+    Charge un enregistrement (.skrec ou .json Blender) sous forme de tableaux NumPy.
+
+    Args:
+        filename: Chemin de l'enregistrement
+    Returns:
+        (noms des articulations, positions (frames, articulations, 3), visibilité (frames, articulations),
+         temps de capture en secondes (frames,)). Pour un .skrec, ce sont des vues sur le fichier projeté
+        en mémoire : rien n'est chargé à l'avance.
+    """
+    if filename.endswith('.skrec'):
+        reader = RecordingReader(filename)
+        return list(reader.joint_names), reader.joints[..., :3], reader.joints[..., 3], reader.timestamps
+
+    with open(filename, 'r') as f:
+        animation_data = json.load(f)
+
+    joint_names = []
+    for frame_data in animation_data:
+        for joint_name in frame_data["bones"]:
+            if joint_name not in joint_names:
+                joint_names.append(joint_name)
+
+    # Une articulation absente d'une frame reste à l'origine avec une visibilité nulle
+    positions = np.zeros((len(animation_data), len(joint_names), 3), dtype=np.float32)
+    visibility = np.zeros((len(animation_data), len(joint_names)), dtype=np.float32)
+    for i, frame_data in enumerate(animation_data):
+        for j, joint_name in enumerate(joint_names):
+            bone_data = frame_data["bones"].get(joint_name)
+            if bone_data is not None:
+                positions[i, j] = bone_data["location"]
+                visibility[i, j] = bone_data["visibility"]
+    timestamps = np.array([frame_data.get("frame", i) for i, frame_data in enumerate(animation_data)], dtype=np.float64) / JSON_FPS
+    return joint_names, positions, visibility, timestamps
+
 
 class SkeletonAnimatorVedo:
     def __init__(self, json_file):
-        """Initialise l'animateur de squelette avec Vedo"""
-        # Charger les données d'animation
-        with open(json_file, 'r') as f:
-            self.animation_data = json.load(f)
+        """Initialise l'animateur de squelette avec Vedo (enregistrement .json ou .skrec)"""
+        # Charger les données d'animation (projetées en mémoire pour un .skrec)
+        self.joint_names, self.positions, self.visibility, timestamps = load_animation_tensor(json_file)
+        # Temps de capture dans un tableau float64 contigu : frame_at fait une recherche dichotomique
+        # par image affichée, sans copier la colonne (vue à pas non contigu d'un .skrec) à chaque appel
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.float64)
+        self.frame_count = len(self.positions)
         
-        print(f"Animation chargée: {len(self.animation_data)} frames")
+        print(f"Animation chargée: {self.frame_count} frames")
         
         # Définir les connexions entre les os
         self.bone_connections = [
@@ -37,10 +85,21 @@ class SkeletonAnimatorVedo:
             ("shin.R", "foot.R"),
         ]
         
+        # Indices (os, 2) des extrémités de chaque os. Un os dont une articulation manque dans
+        # l'enregistrement n'est jamais visible : il n'est pas affiché.
+        self.edges = np.array([[self.joint_names.index(start), self.joint_names.index(end)]
+                               for start, end in self.bone_connections
+                               if start in self.joint_names and end in self.joint_names], dtype=np.intp).reshape(-1, 2)
+
+        # Couleurs RGBA de base (l'alpha est mis à zéro pour les éléments peu visibles)
+        self.joint_colors = np.tile(np.array([255, 0, 0, 255], dtype=np.uint8), (len(self.joint_names), 1))
+        self.bone_colors = np.tile(np.array([0, 255, 255, 255], dtype=np.uint8), (len(self.edges), 1))
+
         # Variables pour l'animation
         self.current_frame = 0
         self.playing = False
         self.plotter = None
+        self.speed = 1.0
 
         # Analyser la plage des données
         self.min_val, self.max_val = self.analyze_data_range()
@@ -50,40 +109,43 @@ class SkeletonAnimatorVedo:
         self.display_range = [self.min_val - margin, self.max_val + margin]
         print(f"Plage d'affichage: [{self.display_range[0]:.3f}, {self.display_range[1]:.3f}]")
     
-    def create_skeleton_for_frame(self, frame_nb):
-        """Crée le squelette pour une frame donnée"""
-        if frame_nb >= len(self.animation_data):
-            return [], []
-        
-        frame_data = self.animation_data[frame_nb]
-        
-        # Extraire les positions des articulations
-        joint_positions = {}
-        for bone_name, bone_data in frame_data["bones"].items():
-            if bone_data["visibility"] > 0.5:  # Filtrer les points peu visibles
-                pos = bone_data["location"]
-                joint_positions[bone_name] = [pos[0], pos[1], pos[2]]
-        
-        # Créer les sphères pour les articulations (taille adaptée)
-        joint_objects = []
-        for joint_name, position in joint_positions.items():
-            sphere = Sphere(position, r=0.03, c='red')  # Taille réduite
-            sphere.name = joint_name
-            joint_objects.append(sphere)
-        
-        # Créer les lignes pour les os (épaisseur adaptée)
-        bone_objects = []
-        for start_bone, end_bone in self.bone_connections:
-            if start_bone in joint_positions and end_bone in joint_positions:
-                start_pos = joint_positions[start_bone]
-                end_pos = joint_positions[end_bone]
-                
-                # Créer une ligne entre les deux points
-                line = Line(start_pos, end_pos, c='cyan', lw=4)  # Couleur plus visible
-                bone_objects.append(line)
-        
-        return joint_objects, bone_objects
+    def is_empty(self):
+        """Vrai (et un message est affiché) si l'enregistrement ne contient aucune frame"""
+        if self.frame_count == 0:
+            print("Enregistrement vide : aucune frame à afficher")
+            return True
+        return False
+
+    def frame_arrays(self, frame_nb):
+        """Positions (nombre d'articulations, 3) et visibilité des articulations pour une frame donnée"""
+        # Seule cette frame est lue (et filtrée) : accès direct par indice
+        return np.asarray(self.positions[frame_nb]), self.visibility[frame_nb] > 0.5  # Filtrer les points peu visibles
     
+    def frame_at(self, playback_time):
+        """
+        Squelette à un instant donné de l'enregistrement, interpolé entre les deux frames qui l'encadrent.
+
+        Args:
+            playback_time: Temps en secondes, dans l'horloge des temps de capture de l'enregistrement
+        Returns:
+            (indice de la frame précédente, positions (nombre d'articulations, 3), visibilité)
+        """
+        index = int(np.searchsorted(self.timestamps, playback_time, side="right")) - 1
+        index = min(max(index, 0), self.frame_count - 1)
+        positions, visible = self.frame_arrays(index)
+        if index + 1 >= self.frame_count:
+            return index, positions, visible
+
+        t0, t1 = self.timestamps[index], self.timestamps[index + 1]
+        alpha = min(max((playback_time - t0) / (t1 - t0), 0.0), 1.0) if t1 > t0 else 0.0
+        next_positions, next_visible = self.frame_arrays(index + 1)
+
+        # Interpolation des articulations visibles dans les deux frames, frame la plus proche sinon
+        both = visible & next_visible
+        nearest_positions, nearest_visible = (next_positions, next_visible) if alpha >= 0.5 else (positions, visible)
+        positions = np.where(both[:, None], positions + alpha * (next_positions - positions), nearest_positions)
+        return index, positions, both | nearest_visible
+
     def setup_camera_and_bounds(self):
         """Configure la caméra et les limites d'affichage"""
         # Configurer les limites de la scène
@@ -98,16 +160,54 @@ class SkeletonAnimatorVedo:
         self.plotter.camera.SetPosition(camera_pos)
         self.plotter.camera.SetFocalPoint(center)
         self.plotter.camera.SetViewUp([0, 0, 1])  # Z vers le haut
+
+    def build_scene(self, title, instructions=None, size=(1200, 800), offscreen=False):
+        """
+        Crée la fenêtre et tous les objets de la scène, une seule fois : articulations (un seul nuage de
+        points), os (un seul ensemble de lignes), grille, textes et caméra. Chaque frame ne fait ensuite
+        que déplacer les points et changer leur visibilité (update_skeleton).
+        Avec offscreen=True, aucune fenêtre n'est affichée (rendu vers des images, voir batchRender).
+        """
+        self.plotter = Plotter(title=title, size=size, axes=1, offscreen=offscreen)
+        self.plotter.background('black')
+
+        positions = np.asarray(self.positions[0]) if self.frame_count else np.zeros((len(self.joint_names), 3), dtype=np.float32)
+
+        # Articulations : un seul acteur pour tous les points
+        self.joints_actor = Points(positions, r=12, c='red')
+
+        # Os : un seul acteur pour toutes les lignes (deux points par os)
+        self.bones_actor = Lines(positions[self.edges[:, 0]], positions[self.edges[:, 1]], c='cyan', lw=4)
+
+        # Grille de référence
+        grid_pos = [(self.max_val + self.min_val) / 2, 
+                    (self.max_val + self.min_val) / 2, 
+                    self.min_val - 0.1]
+        grid_size = abs(self.max_val - self.min_val) * 1.5
+        grid = Grid(pos=grid_pos, s=[grid_size, grid_size], c='gray', alpha=0.2)
+
+        # Textes (mis à jour sur place)
+        self.frame_text = Text2D("", pos='top-left', s=1.0, c='white')
+        self.plotter.add(self.joints_actor, self.bones_actor, grid, self.frame_text)
+        if instructions:
+            self.plotter.add(Text2D(instructions, pos='bottom-left', s=0.8, c='yellow'))
+
+        # Configuration de la caméra, une seule fois
+        self.setup_camera_and_bounds()
     
     def on_key_press(self, event):
         """Gestionnaire d'événements clavier"""
         key = event.keyPressed
         
+        # Enregistrement vide : seule la fermeture de la fenêtre a un sens
+        if self.frame_count == 0 and key not in ('q', 'Escape'):
+            return
+
         if key == 'space' or key == 'Right':
-            self.current_frame = (self.current_frame + 1) % len(self.animation_data)
+            self.current_frame = (self.current_frame + 1) % self.frame_count
             self.update_skeleton()
         elif key == 'Left':
-            self.current_frame = (self.current_frame - 1) % len(self.animation_data)
+            self.current_frame = (self.current_frame - 1) % self.frame_count
             self.update_skeleton()
         elif key == 'r':
             self.current_frame = 0
@@ -118,175 +218,153 @@ class SkeletonAnimatorVedo:
         elif key == 'q' or key == 'Escape':
             self.plotter.close()
     
-    def update_skeleton(self):
-        """Met à jour l'affichage du squelette"""
-        # Effacer les objets précédents (sauf les axes et grille)
-        self.plotter.clear()
-        
-        # Reconfigurer la caméra après clear
-        self.setup_camera_and_bounds()
-        
-        # Créer le squelette pour la frame actuelle
-        joints, bones = self.create_skeleton_for_frame(self.current_frame)
-        
-        # Ajouter tous les objets à la scène
-        for joint in joints:
-            self.plotter.add(joint)
-        
-        for bone in bones:
-            self.plotter.add(bone)
-        
-        # Ajouter une grille de référence
-        grid_pos = [(self.max_val + self.min_val) / 2, 
-                    (self.max_val + self.min_val) / 2, 
-                    self.min_val - 0.1]
-        grid_size = abs(self.max_val - self.min_val) * 1.5
-        grid = Grid(pos=grid_pos, s=[grid_size, grid_size], c='gray', alpha=0.2)
-        self.plotter.add(grid)
-        
-        # Texte pour le numéro de frame (position adaptée)
-        text_pos = [self.min_val, self.min_val, self.max_val + 0.1]
-        frame_text = Text3D(f"Frame: {self.current_frame + 1}/{len(self.animation_data)}", 
-                           pos=text_pos, s=0.05, c='white')
-        self.plotter.add(frame_text)
-        
-        # Instructions (position adaptée)
-        instr_pos = [self.min_val, self.min_val, self.max_val - 0.1]
-        instructions = Text3D("ESPACE/→: Suiv | ←: Prec | R: Début | Q: Quitter", 
-                             pos=instr_pos, s=0.03, c='yellow')
-        self.plotter.add(instructions)
-        
+    def update_skeleton(self, render=True, suffix="", positions=None, visible=None):
+        """
+        Met à jour l'affichage du squelette : seules les coordonnées et la visibilité changent.
+        Par défaut la frame courante est affichée, sinon les positions et la visibilité données (frame_at).
+        """
+        if positions is None and self.frame_count == 0:
+            # Enregistrement vide (personne détectée pendant l'enregistrement) : rien à afficher
+            positions = np.zeros((len(self.joint_names), 3), dtype=np.float32)
+            visible = np.zeros(len(self.joint_names), dtype=bool)
+        elif positions is None:
+            positions, visible = self.frame_arrays(self.current_frame)
+
+        # Déplacer les points sur place (deux points par os, dans l'ordre de self.edges)
+        self.joints_actor.vertices = positions
+        self.bones_actor.vertices = positions[self.edges].reshape(-1, 3)
+
+        # Visibilité : les points et os peu visibles deviennent transparents
+        joint_colors = self.joint_colors.copy()
+        joint_colors[:, 3] = np.where(visible, 255, 0)
+        self.joints_actor.pointcolors = joint_colors
+
+        bone_colors = self.bone_colors.copy()
+        bone_colors[:, 3] = np.where(visible[self.edges].all(axis=1), 255, 0)
+        self.bones_actor.cellcolors = bone_colors
+
+        # Texte pour le numéro de frame
+        self.frame_text.text(f"Frame: {self.current_frame + 1}/{self.frame_count}{suffix}")
+
         # Forcer la mise à jour
-        self.plotter.render()
+        if render:
+            self.plotter.render()
     
     def animate_interactive(self):
         """Animation interactive avec contrôles clavier"""
-        self.plotter = Plotter(title="Animation Squelette 3D - Interactive", 
-                              size=(1200, 800), axes=1)
-        self.plotter.background('black')
-        
-        # Configuration initiale
-        self.setup_camera_and_bounds()
+        if self.is_empty():
+            return
+        self.build_scene("Animation Squelette 3D - Interactive",
+                         "ESPACE/→: Suiv | ←: Prec | R: Début | Q: Quitter")
         
         # Ajouter le gestionnaire d'événements
         self.plotter.add_callback('KeyPress', self.on_key_press)
         
         # Afficher la première frame
-        self.update_skeleton()
+        self.update_skeleton(render=False)
         
         # Lancer la boucle interactive
-        self.plotter.show(interactive=True)
+        self.plotter.show(interactive=True, resetcam=False)
     
-    def animate_continuous(self, fps=20):
-        """Animation continue automatique avec contrôles"""
-        self.plotter = Plotter(title="Animation Squelette 3D - Continue (ESC pour quitter)", 
-                              size=(1200, 800), axes=1)
-        self.plotter.background('black')
-        
-        # Configuration initiale de la caméra
-        self.setup_camera_and_bounds()
+    def change_speed(self, step):
+        """Passe à la vitesse de lecture suivante (step=1) ou précédente (step=-1) de PLAYBACK_SPEEDS"""
+        index = min(range(len(PLAYBACK_SPEEDS)), key=lambda i: abs(PLAYBACK_SPEEDS[i] - self.speed))
+        self.speed = PLAYBACK_SPEEDS[min(max(index + step, 0), len(PLAYBACK_SPEEDS) - 1)]
+        print(f"Vitesse de lecture: x{self.speed:g}")
+
+    def animate_continuous(self, speed=1.0, max_fps=60):
+        """
+        Animation continue, en temps réel d'après les temps de capture de l'enregistrement.
+
+        L'horloge murale détermine l'instant de l'enregistrement à afficher : la frame est choisie (et
+        interpolée) pour cet instant, et les frames sont sautées si l'affichage prend du retard.
+        """
+        if self.is_empty():
+            return
+        self.build_scene("Animation Squelette 3D - Continue (ESC pour quitter)",
+                         "+/-: Vitesse | ESC: Quitter")
         
         # Variables pour l'animation
-        frame_delay = 1.0 / fps
-        start_time = time.time()
-        
-        # Gestionnaire pour quitter avec ESC
+        frame_delay = 1.0 / max_fps
+        closed = []
+        self.speed = speed
+        
+        # Instant de l'enregistrement = origin + (horloge - clock_start) * vitesse. Un changement de
+        # vitesse ne fait que déplacer l'origine : rien de plus à calculer par frame.
+        start, end = float(self.timestamps[0]), float(self.timestamps[-1])
+        origin, clock_start = start, time.perf_counter()
+
+        def rebase(step):
+            nonlocal origin, clock_start
+            now = time.perf_counter()
+            origin += (now - clock_start) * self.speed
+            clock_start = now
+            self.change_speed(step)
+
+        # Gestionnaire pour quitter avec ESC et changer la vitesse
         def key_handler(event):
             if event.keyPressed in ['q', 'Escape']:
+                closed.append(True)
                 self.plotter.close()
                 return True
+            if event.keyPressed in ['plus', 'KP_Add', 'minus', 'KP_Subtract']:
+                rebase(1 if event.keyPressed in ['plus', 'KP_Add'] else -1)
             return False
         
         self.plotter.add_callback('KeyPress', key_handler)
-        
+
+        # Afficher la scène une première fois (mode non bloquant)
+        self.current_frame = 0
+        self.update_skeleton(render=False)
+        self.plotter.show(interactive=False, resetcam=False)
+        clock_start = time.perf_counter()
+
         # Boucle d'animation
-        for frame_idx in range(len(self.animation_data)):
-            loop_start = time.time()
-            
-            # Effacer les objets précédents
-            self.plotter.clear()
-            
-            # Reconfigurer la caméra
-            self.setup_camera_and_bounds()
-            
-            # Créer le squelette pour la frame actuelle
-            joints, bones = self.create_skeleton_for_frame(frame_idx)
-            
-            # Ajouter tous les objets à la scène
-            for joint in joints:
-                self.plotter.add(joint)
-            
-            for bone in bones:
-                self.plotter.add(bone)
-            
-            # Ajouter grille de référence
-            grid_pos = [(self.max_val + self.min_val) / 2, 
-                        (self.max_val + self.min_val) / 2, 
-                        self.min_val - 0.1]
-            grid_size = abs(self.max_val - self.min_val) * 1.5
-            grid = Grid(pos=grid_pos, s=[grid_size, grid_size], c='gray', alpha=0.2)
-            self.plotter.add(grid)
-            
-            # Texte pour le numéro de frame
-            text_pos = [self.min_val, self.min_val, self.max_val + 0.1]
-            frame_text = Text3D(f"Frame: {frame_idx + 1}/{len(self.animation_data)} | ESC: Quitter", 
-                               pos=text_pos, s=0.05, c='white')
-            self.plotter.add(frame_text)
-            
-            # Afficher la scène (mode interactif pour permettre les contrôles caméra)
-            self.plotter.show(interactive=False, resetcam=False)
+        while not closed:
+            loop_start = time.perf_counter()
+            playback_time = origin + (loop_start - clock_start) * self.speed
+            if playback_time > end:
+                break
+
+            self.current_frame, positions, visible = self.frame_at(playback_time)
+            self.update_skeleton(suffix=f" | x{self.speed:g}", positions=positions, visible=visible)
+
+            # Traiter les événements (contrôles caméra et clavier)
+            self.plotter.interactor.ProcessEvents()
             
-            # Gérer le timing
-            loop_time = time.time() - loop_start
-            remaining_time = frame_delay - loop_time
+            # Limiter la cadence d'affichage : le temps de lecture ne dépend que de l'horloge
+            remaining_time = frame_delay - (time.perf_counter() - loop_start)
             if remaining_time > 0:
                 time.sleep(remaining_time)
     
-    def animate_with_timer(self, fps=20):
-        """Animation avec timer Vedo - VERSION AMÉLIORÉE"""
-        self.plotter = Plotter(title="Animation Squelette 3D - Timer", 
-                              size=(1200, 800), axes=1)
-        self.plotter.background('black')
-        
-        # Configuration initiale
-        self.setup_camera_and_bounds()
+    def animate_with_timer(self, fps=20, speed=1.0):
+        """Animation avec timer Vedo, en boucle, en temps réel d'après les temps de capture"""
+        if self.is_empty():
+            return
+        self.build_scene("Animation Squelette 3D - Timer", "+/-: Vitesse | Q: Quitter")
         self.current_frame = 0
+        self.speed = speed
+
+        # Même horloge que animate_continuous, la lecture reprend au début à la fin de l'enregistrement
+        start = float(self.timestamps[0])
+        duration = max(float(self.timestamps[-1]) - start, 1e-6)
+        position, clock_start = 0.0, time.perf_counter()
         
         def timer_callback(event):
-            # Effacer et recréer
-            self.plotter.clear()
-            self.setup_camera_and_bounds()
-            
-            # Créer le squelette
-            joints, bones = self.create_skeleton_for_frame(self.current_frame)
-            
-            for joint in joints:
-                self.plotter.add(joint)
-            for bone in bones:
-                self.plotter.add(bone)
-            
-            # Grille et textes
-            grid_pos = [(self.max_val + self.min_val) / 2, 
-                        (self.max_val + self.min_val) / 2, 
-                        self.min_val - 0.1]
-            grid_size = abs(self.max_val - self.min_val) * 1.5
-            grid = Grid(pos=grid_pos, s=[grid_size, grid_size], c='gray', alpha=0.2)
-            self.plotter.add(grid)
-            
-            text_pos = [self.min_val, self.min_val, self.max_val + 0.1]
-            frame_text = Text3D(f"Frame: {self.current_frame + 1}/{len(self.animation_data)}", 
-                               pos=text_pos, s=0.05, c='white')
-            self.plotter.add(frame_text)
-            
-            # Passer à la frame suivante
-            self.current_frame = (self.current_frame + 1) % len(self.animation_data)
-            
-            self.plotter.render()
+            playback_time = start + (position + (time.perf_counter() - clock_start) * self.speed) % duration
+            self.current_frame, positions, visible = self.frame_at(playback_time)
+            self.update_skeleton(suffix=f" | x{self.speed:g}", positions=positions, visible=visible)
         
         # Gestionnaire clavier
         def key_handler(event):
+            nonlocal position, clock_start
             if event.keyPressed in ['q', 'Escape']:
                 self.plotter.close()
+            elif event.keyPressed in ['plus', 'KP_Add', 'minus', 'KP_Subtract']:
+                now = time.perf_counter()
+                position += (now - clock_start) * self.speed
+                clock_start = now
+                self.change_speed(1 if event.keyPressed in ['plus', 'KP_Add'] else -1)
         
         # Ajouter les callbacks
         self.plotter.add_callback('timer', timer_callback)
@@ -296,59 +374,35 @@ class SkeletonAnimatorVedo:
         self.plotter.timer_callback('create', dt=int(1000/fps))
         
         # Afficher la première frame
-        timer_callback(None)
+        self.update_skeleton(render=False)
         
         # Lancer l'animation
-        self.plotter.show(interactive=True)
+        self.plotter.show(interactive=True, resetcam=False)
     
     def show_single_frame(self, frame_idx=0):
         """Affiche une seule frame pour tester"""
-        self.plotter = Plotter(title="Animation Squelette 3D - Frame statique", 
-                              size=(1200, 800), axes=1)
-        self.plotter.background('black')
-        
-        # Configuration de la caméra
-        self.setup_camera_and_bounds()
-        
-        joints, bones = self.create_skeleton_for_frame(frame_idx)
-        
-        # Ajouter tous les objets à la scène
-        for joint in joints:
-            self.plotter.add(joint)
-        
-        for bone in bones:
-            self.plotter.add(bone)
-        
-        # Grille de référence
-        grid_pos = [(self.max_val + self.min_val) / 2, 
-                    (self.max_val + self.min_val) / 2, 
-                    self.min_val - 0.1]
-        grid_size = abs(self.max_val - self.min_val) * 1.5
-        grid = Grid(pos=grid_pos, s=[grid_size, grid_size], c='gray', alpha=0.2)
-        self.plotter.add(grid)
-        
-        # Texte
-        text_pos = [self.min_val, self.min_val, self.max_val + 0.1]
-        frame_text = Text3D(f"Frame: {frame_idx + 1}/{len(self.animation_data)}", 
-                           pos=text_pos, s=0.05, c='white')
-        self.plotter.add(frame_text)
+        if self.is_empty():
+            return
+        self.build_scene("Animation Squelette 3D - Frame statique")
+
+        self.current_frame = frame_idx
+        self.update_skeleton(render=False)
         
         # Afficher la scène de manière interactive
-        self.plotter.show()
+        self.plotter.show(resetcam=False)
         
-    def analyze_data_range(self):
-        """Analyse la plage des données pour optimiser l'affichage"""
-        all_positions = []
+    def analyze_data_range(self, block_size=4096):
+        """Analyse la plage des données pour optimiser l'affichage (par blocs de frames)"""
+        min_val, max_val = np.inf, -np.inf
         
-        for frame_data in self.animation_data:
-            for bone_name, bone_data in frame_data["bones"].items():
-                if bone_data["visibility"] > 0.5:
-                    pos = bone_data["location"]
-                    all_positions.extend(pos)
+        for start in range(0, self.frame_count, block_size):
+            positions = np.asarray(self.positions[start:start + block_size])
+            visible_positions = positions[self.visibility[start:start + block_size] > 0.5]
+            if visible_positions.size:
+                min_val = min(min_val, float(visible_positions.min()))
+                max_val = max(max_val, float(visible_positions.max()))
         
-        if all_positions:
-            min_val = min(all_positions)
-            max_val = max(all_positions)
+        if min_val <= max_val:
             print(f"Plage des données: [{min_val:.3f}, {max_val:.3f}]")
             return min_val, max_val
         return -1, 1
@@ -357,11 +411,11 @@ if __name__ == "__main__":
     try:
         # Trouver le fichier d'animation le plus récent
         import os
-        json_files = [f for f in os.listdir('.') if f.startswith('animation_data_') and f.endswith('.json')]
+        json_files = [f for f in os.listdir('.') if f.startswith('animation_data_') and f.endswith(('.json', '.skrec'))]
         
         if not json_files:
             print("Aucun fichier d'animation trouvé!")
-            print("Assurez-vous d'avoir un fichier 'animation_data_XXXXXXXX_XXXXXX.json'")
+            print("Assurez-vous d'avoir un fichier 'animation_data_XXXXXXXX_XXXXXX.skrec' (ou .json)")
             exit(1)
         
         json_file = sorted(json_files)[-1]
@@ -369,6 +423,8 @@ if __name__ == "__main__":
         
         # Créer l'animateur
         animator = SkeletonAnimatorVedo(json_file)
+        if animator.is_empty():
+            exit(1)
         
         # Menu de choix
         print("\nOptions d'animation:")
@@ -380,10 +436,10 @@ if __name__ == "__main__":
         choice = input("Choisissez une option (1-4): ").strip()
         
         if choice == "1":
-            frame_num = input(f"Numéro de frame à afficher (1-{len(animator.animation_data)}): ")
+            frame_num = input(f"Numéro de frame à afficher (1-{animator.frame_count}): ")
             try:
                 frame_idx = int(frame_num) - 1
-                if 0 <= frame_idx < len(animator.animation_data):
+                if 0 <= frame_idx < animator.frame_count:
                     animator.show_single_frame(frame_idx)
                 else:
                     print("Numéro de frame invalide!")
@@ -399,12 +455,12 @@ if __name__ == "__main__":
             animator.animate_interactive()
             
         elif choice == "3":
-            fps = input("FPS d'animation (défaut: 20): ").strip()
+            speed = input("Vitesse de lecture (0.25 à 4, défaut: 1): ").strip()
             try:
-                fps = int(fps) if fps else 20
-                animator.animate_continuous(fps=fps)
+                speed = min(max(float(speed), PLAYBACK_SPEEDS[0]), PLAYBACK_SPEEDS[-1]) if speed else 1.0
+                animator.animate_continuous(speed=speed)
             except ValueError:
-                animator.animate_continuous(fps=20)
+                animator.animate_continuous()
                 
         elif choice == "4":
             fps = input("FPS d'animation (défaut: 10): ").strip()
@@ -0,0 +1,198 @@
+import cv2
+import os
+import numpy as np
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+# Importation des fonctions locales
+import positionFunctions as pf
+import cameraCalibration as cc
+from undistortion import Undistorter
+from recording import RecordingWriter
+from poseTracker import PoseTracker
+
+"""
+Traitement par lots de fichiers vidéo, sans interface graphique.
+
+Chaque vidéo est découpée en tranches de durée fixe, traitées en parallèle par un pool de processus.
+Chaque tranche est traitée par une nouvelle instance de mp_pose.Pose. Une tranche commence quelques secondes
+avant son début réel (recouvrement de chauffe) : les frames de chauffe ne sont pas enregistrées, elles
+servent seulement à ce que le suivi de MediaPipe soit valide dès la première frame de la tranche.
+
+Utilisation:
+    python3 batchDetection.py session1.mp4 session2.mp4 --workers 8 --output-dir recordings
+"""
+
+# Paramètres du tracker (calibration et correction de la distorsion) propres à chaque processus
+_tracker_options = None
+
+
+def _init_worker(camera_matrix, dist_coeffs, undistortion_mode):
+    """
+    Initialise un processus du pool : mémorise les paramètres des trackers créés pour chaque tranche.
+
+    Args:
+        camera_matrix: Matrice de la caméra
+        dist_coeffs: Coefficients de distorsion
+        undistortion_mode: Mode de correction de la distorsion ("remap" ou "points")
+    Returns:
+        None
+    """
+    global _tracker_options
+    _tracker_options = (camera_matrix, dist_coeffs, undistortion_mode)
+
+
+def plan_chunks(video_path, chunk_seconds, warmup_seconds):
+    """
+    Découpe une vidéo en tranches temporelles.
+
+    Args:
+        video_path: Chemin de la vidéo
+        chunk_seconds: Durée d'une tranche en secondes
+        warmup_seconds: Durée du recouvrement de chauffe en secondes
+    Returns:
+        Liste de tuples (chemin, première frame enregistrée, frame de fin exclue ou None, première frame lue)
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    # Nombre de frames inconnu (flux, conteneur incomplet) : une seule tranche jusqu'à la fin
+    if frame_total <= 0:
+        return [(video_path, 0, None, 0)]
+
+    chunk_frames = max(1, int(round(chunk_seconds * fps)))
+    warmup_frames = max(0, int(round(warmup_seconds * fps)))
+
+    chunks = []
+    for start in range(0, frame_total, chunk_frames):
+        end = min(start + chunk_frames, frame_total)
+        chunks.append((video_path, start, end, max(0, start - warmup_frames)))
+    return chunks
+
+
+def process_chunk(chunk):
+    """
+    Traite une tranche de vidéo dans un processus du pool.
+
+    Args:
+        chunk: Tuple (chemin, première frame enregistrée, frame de fin exclue ou None, première frame lue)
+    Returns:
+        (numéros de frame (n,), timestamps en secondes (n,), os Blender (n, 12, 4))
+    """
+    video_path, start, end, read_start = chunk
+
+    # Un nouveau modèle par tranche : la région suivie et le lissage de MediaPipe ne doivent pas venir
+    # de la tranche précédemment traitée par ce processus (autre vidéo ou autre moment)
+    camera_matrix, dist_coeffs, undistortion_mode = _tracker_options
+    tracker = PoseTracker(camera_matrix, dist_coeffs, undistortion_mode=undistortion_mode)
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if read_start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, read_start)
+
+    frame_numbers = []
+    bones = []
+    frame_number = read_start
+    while end is None or frame_number < end:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        body_coordinates_3d = tracker.process(frame)
+
+        # Les frames de chauffe ne sont pas enregistrées
+        if frame_number >= start and body_coordinates_3d is not None:
+            frame_numbers.append(frame_number)
+            bones.append(pf.blender_bone_array(body_coordinates_3d))
+        frame_number += 1
+
+    cap.release()
+    tracker.close()
+
+    frame_numbers = np.array(frame_numbers, dtype=np.int64)
+    bones = np.array(bones, dtype=np.float32).reshape(-1, len(pf.BLENDER_BONE_NAMES), 4)
+    return frame_numbers, frame_numbers / fps, bones
+
+
+def output_path_for(video_path, output_dir):
+    """
+    Args:
+        video_path: Chemin de la vidéo
+        output_dir: Dossier de sortie
+    Returns:
+        Le chemin de l'enregistrement correspondant à la vidéo
+    """
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_dir, f"animation_data_{name}.skrec")
+
+
+def process_videos(video_paths, output_dir, workers=None, chunk_seconds=60.0, warmup_seconds=2.0,
+                   undistortion_mode="points"):
+    """
+    Traite plusieurs vidéos en parallèle et écrit un enregistrement par vidéo.
+
+    Args:
+        video_paths: Liste des chemins des vidéos
+        output_dir: Dossier de sortie des enregistrements
+        workers: Nombre de processus (défaut : nombre de coeurs)
+        chunk_seconds: Durée d'une tranche en secondes
+        warmup_seconds: Durée du recouvrement de chauffe en secondes
+        undistortion_mode: Mode de correction de la distorsion ("remap" ou "points")
+    Returns:
+        Liste des chemins des enregistrements écrits
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Calibration chargée une seule fois puis transmise aux processus (sans fenêtre de prévisualisation)
+    camera_matrix, dist_coeffs = cc.calibrate_camera(preview=False)
+
+    chunks_per_video = {path: plan_chunks(path, chunk_seconds, warmup_seconds) for path in video_paths}
+    total_chunks = sum(len(chunks) for chunks in chunks_per_video.values())
+    print(f"{len(video_paths)} vidéos découpées en {total_chunks} tranches")
+
+    start_time = time.time()
+    written = []
+
+    # "spawn" : chaque processus démarre sans l'état de MediaPipe du processus parent
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(camera_matrix, dist_coeffs, undistortion_mode)) as executor:
+        futures = {path: [executor.submit(process_chunk, chunk) for chunk in chunks]
+                   for path, chunks in chunks_per_video.items()}
+
+        for path, chunk_futures in futures.items():
+            # Les tranches sont écrites dans l'ordre, au fur et à mesure qu'elles se terminent
+            filename = output_path_for(path, output_dir)
+            with RecordingWriter(filename, pf.BLENDER_BONE_NAMES, metadata={"source": path}) as writer:
+                for future in chunk_futures:
+                    frame_numbers, timestamps, bones = future.result()
+                    writer.write_block(bones, frame_numbers, timestamps)
+
+            print(f"{path} -> '{filename}' ({writer.frame_count} frames)")
+            written.append(filename)
+
+    print(f"Traitement terminé en {time.time() - start_time:.1f} s")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction de la pose depuis des fichiers vidéo, sans interface graphique.")
+    parser.add_argument("videos", nargs="+", help="Fichiers vidéo à traiter")
+    parser.add_argument("--output-dir", default="recordings", help="Dossier de sortie des enregistrements")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de coeurs)")
+    parser.add_argument("--chunk-seconds", type=float, default=60.0, help="Durée d'une tranche en secondes")
+    parser.add_argument("--warmup-seconds", type=float, default=2.0, help="Recouvrement de chauffe entre les tranches")
+    parser.add_argument("--undistort", choices=Undistorter.MODES, default="points",
+                        help="Mode de correction de la distorsion")
+    args = parser.parse_args()
+
+    process_videos(args.videos, args.output_dir, workers=args.workers, chunk_seconds=args.chunk_seconds,
+                   warmup_seconds=args.warmup_seconds, undistortion_mode=args.undistort)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import cv2
+import os
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+"""
+Rendu par lots des enregistrements vers des vidéos, sans fenêtre.
+
+Chaque enregistrement est dessiné hors écran (même scène que animationTest.py, à résolution et caméra
+fixes) puis encodé directement en MP4, ou écrit image par image, au rythme de ses temps de capture.
+Les enregistrements sont rendus en parallèle, un processus du pool par enregistrement. Sur un serveur
+sans affichage, VTK doit disposer d'un rendu hors écran (EGL ou OSMesa).
+
+Utilisation:
+    python3 batchRender.py recordings/*.skrec --workers 4 --output-dir review
+    python3 batchRender.py animation_data_XXXXXXXX_XXXXXX.skrec --frames
+"""
+
+
+def render_recording(recording_path, output_path, fps=30.0, size=(1280, 720), frames=False):
+    """
+    Dessine un enregistrement hors écran et l'écrit en vidéo ou en images.
+
+    Args:
+        recording_path: Chemin de l'enregistrement (.skrec ou .json)
+        output_path: Chemin de la vidéo, ou dossier des images si frames est vrai
+        fps: Nombre d'images par seconde de la vidéo
+        size: Résolution (largeur, hauteur) du rendu
+        frames: Écrire une image PNG par frame au lieu d'une vidéo
+    Returns:
+        Nombre d'images rendues (0 pour un enregistrement vide, rien n'est écrit)
+    """
+    # Importé dans le processus du pool : vedo (VTK) n'est chargé que là où il sert
+    from animationTest import SkeletonAnimatorVedo
+
+    animator = SkeletonAnimatorVedo(recording_path)
+    # Enregistrement sans frame (personne détectée pendant l'enregistrement) : ignoré
+    if animator.frame_count == 0:
+        return 0
+
+    animator.build_scene(os.path.basename(recording_path), size=size, offscreen=True)
+    animator.update_skeleton(render=False)
+    animator.plotter.show(interactive=False, resetcam=False)
+
+    if frames:
+        os.makedirs(output_path, exist_ok=True)
+        writer = None
+    else:
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, tuple(size))
+        if not writer.isOpened():
+            raise IOError(f"Impossible d'ouvrir la vidéo '{output_path}' en écriture")
+
+    # Images espacées régulièrement dans le temps de capture : la vidéo est en temps réel même si le
+    # débit de l'enregistrement variait (frames interpolées, ou sautées si l'enregistrement est plus dense)
+    start = float(animator.timestamps[0])
+    duration = float(animator.timestamps[-1]) - start
+    image_count = int(duration * fps) + 1
+
+    try:
+        for frame_idx in range(image_count):
+            animator.current_frame, positions, visible = animator.frame_at(start + frame_idx / fps)
+            animator.update_skeleton(positions=positions, visible=visible)
+
+            # Image RGB du rendu, redimensionnée si la fenêtre hors écran n'a pas exactement la taille demandée
+            image = cv2.cvtColor(animator.plotter.screenshot(asarray=True), cv2.COLOR_RGB2BGR)
+            if (image.shape[1], image.shape[0]) != tuple(size):
+                image = cv2.resize(image, tuple(size))
+
+            if writer is None:
+                cv2.imwrite(os.path.join(output_path, f"frame_{frame_idx:06d}.png"), image)
+            else:
+                writer.write(image)
+    finally:
+        if writer is not None:
+            writer.release()
+        animator.plotter.close()
+
+    return image_count
+
+
+def _render_task(task):
+    recording_path, output_path, fps, size, frames = task
+    return recording_path, output_path, render_recording(recording_path, output_path, fps, size, frames)
+
+
+def output_path_for(recording_path, output_dir, frames=False):
+    """
+    Args:
+        recording_path: Chemin de l'enregistrement
+        output_dir: Dossier de sortie
+        frames: Sortie en images (un dossier) au lieu d'une vidéo
+    Returns:
+        Le chemin de la vidéo (ou du dossier d'images) correspondant à l'enregistrement
+    """
+    name = os.path.splitext(os.path.basename(recording_path))[0]
+    return os.path.join(output_dir, name if frames else f"{name}.mp4")
+
+
+def render_recordings(recording_paths, output_dir, workers=None, fps=30.0, size=(1280, 720), frames=False):
+    """
+    Rend plusieurs enregistrements en parallèle.
+
+    Args:
+        recording_paths: Liste des chemins des enregistrements
+        output_dir: Dossier de sortie
+        workers: Nombre de processus (défaut : nombre de coeurs)
+        fps: Nombre d'images par seconde des vidéos
+        size: Résolution (largeur, hauteur) du rendu
+        frames: Écrire des images PNG au lieu de vidéos
+    Returns:
+        Liste des chemins écrits. Les enregistrements vides sont ignorés, et l'échec d'un enregistrement
+        est affiché sans interrompre les autres.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(path, output_path_for(path, output_dir, frames), fps, tuple(size), frames) for path in recording_paths]
+
+    start_time = time.time()
+    written = []
+    failed = []
+
+    # "spawn" : chaque processus crée son propre contexte de rendu VTK
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(_render_task, task): task[0] for task in tasks}
+        for future in as_completed(futures):
+            try:
+                path, output_path, frame_count = future.result()
+            except Exception as e:
+                print(f"Erreur de rendu pour '{futures[future]}': {e!r}")
+                failed.append(futures[future])
+                continue
+
+            if frame_count == 0:
+                print(f"{path} : enregistrement vide, ignoré")
+                continue
+            print(f"{path} -> '{output_path}' ({frame_count} images)")
+            written.append(output_path)
+
+    print(f"Rendu terminé en {time.time() - start_time:.1f} s ({len(written)} rendus, {len(failed)} échecs)")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendu des enregistrements en vidéo, sans fenêtre.")
+    parser.add_argument("recordings", nargs="+", help="Enregistrements à rendre (.skrec ou .json)")
+    parser.add_argument("--output-dir", default="renders", help="Dossier de sortie")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de coeurs)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Images par seconde des vidéos")
+    parser.add_argument("--size", type=int, nargs=2, default=[1280, 720], metavar=("LARGEUR", "HAUTEUR"),
+                        help="Résolution du rendu")
+    parser.add_argument("--frames", action="store_true", help="Écrire des images PNG au lieu de vidéos MP4")
+    args = parser.parse_args()
+
+    render_recordings(args.recordings, args.output_dir, workers=args.workers, fps=args.fps,
+                      size=args.size, frames=args.frames)
+
+
+if __name__ == "__main__":
+    main()
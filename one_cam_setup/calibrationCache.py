@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import struct
+import zipfile
+import numpy as np
+
+"""
+Cache des calibrations, adressé par le contenu.
+
+Le résultat d'une calibration est enregistré dans un fichier .npz dont le nom est un hash des entrées :
+contenu des images, géométrie de l'échiquier et taille des images. Une recalibration n'a donc lieu que
+lorsque les entrées changent réellement. Les fichiers .npz sont écrits sans compression, ce qui permet
+de les ouvrir par projection en mémoire (load_npz_mmap) : le démarrage ne coûte que la lecture de
+quelques octets.
+
+Pour éviter de relire toutes les images à chaque démarrage, le hash de chaque fichier est mémorisé
+avec sa taille et sa date de modification (index.json) : un fichier inchangé n'est pas relu.
+"""
+
+CACHE_DIR = "calibration_cache"
+_INDEX_FILE = "index.json"
+
+
+def _load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, _INDEX_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = os.path.join(cache_dir, _INDEX_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(cache_dir, _INDEX_FILE))
+
+
+def file_digests(paths, cache_dir=CACHE_DIR):
+    """
+    Hash du contenu de chaque fichier. Les fichiers dont la taille et la date de modification n'ont pas
+    changé depuis le dernier appel ne sont pas relus.
+
+    Args:
+        paths: Liste des chemins des fichiers
+        cache_dir: Dossier du cache
+    Returns:
+        Liste des hash (hexadécimal), dans l'ordre de paths
+    """
+    index = _load_index(cache_dir)
+    changed = False
+    digests = []
+
+    for path in paths:
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        fingerprint = [stat.st_size, stat.st_mtime_ns]
+
+        entry = index.get(key)
+        if entry is None or entry[:2] != fingerprint:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            entry = fingerprint + [h.hexdigest()]
+            index[key] = entry
+            changed = True
+
+        digests.append(entry[2])
+
+    if changed:
+        _save_index(cache_dir, index)
+    return digests
+
+
+def calibration_key(kind, image_paths, board_size, world_scaling=1, image_size=None, extra=None,
+                    ordered=False, cache_dir=CACHE_DIR):
+    """
+    Clé de cache d'une calibration.
+
+    Args:
+        kind: Type de calibration ("mono", "stereo", ...)
+        image_paths: Chemins des images utilisées
+        board_size: Nombre de coins internes de l'échiquier
+        world_scaling: Taille d'une case de l'échiquier
+        image_size: Taille des images passée à la calibration (None : déduite des images, donc de leur contenu)
+        extra: Autres entrées de la calibration (paramètres, matrices des caméras, ...)
+        ordered: L'ordre des images compte (images appariées d'une calibration stéréo)
+        cache_dir: Dossier du cache
+    Returns:
+        La clé (hexadécimal)
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([kind, list(board_size), world_scaling,
+                         list(image_size) if image_size is not None else None]).encode())
+    digests = file_digests(image_paths, cache_dir)
+    for digest in (digests if ordered else sorted(digests)):
+        h.update(digest.encode())
+    for value in extra or []:
+        h.update(np.ascontiguousarray(value).tobytes() if isinstance(value, np.ndarray) else repr(value).encode())
+    return h.hexdigest()
+
+
+def cache_path(kind, key, cache_dir=CACHE_DIR):
+    """
+    Args:
+        kind: Type de calibration
+        key: Clé retournée par calibration_key
+        cache_dir: Dossier du cache
+    Returns:
+        Le chemin du fichier .npz correspondant
+    """
+    return os.path.join(cache_dir, f"{kind}_{key[:24]}.npz")
+
+
+def save_npz(path, **arrays):
+    """
+    Enregistre des tableaux dans un .npz non compressé (compatible avec load_npz_mmap).
+    L'écriture passe par un fichier temporaire : un fichier interrompu n'est jamais lu.
+
+    Args:
+        path: Chemin du fichier
+        **arrays: Tableaux à enregistrer
+    Returns:
+        None
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_npz_mmap(path):
+    """
+    Ouvre un .npz non compressé par projection en mémoire (np.load ignore mmap_mode pour les .npz).
+
+    Args:
+        path: Chemin du fichier
+    Returns:
+        Dictionnaire nom -> tableau (np.memmap en lecture seule)
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: '{info.filename}' est compressé et ne peut pas être projeté en mémoire")
+
+            # Position des données : en-tête local du zip (30 octets + nom + champ extra)
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            # En-tête .npy puis données brutes
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            size = int(np.prod(shape))
+            if dtype.hasobject:
+                raise ValueError(f"{path}: '{name}' contient des objets Python")
+            if shape == () or size == 0:
+                # Scalaires et tableaux vides : lecture directe
+                arrays[name] = np.frombuffer(f.read(dtype.itemsize * size), dtype=dtype).reshape(shape)
+            else:
+                arrays[name] = np.memmap(f.name, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran_order else "C")
+    return arrays
+
+
+def load_calibration(kind, key, cache_dir=CACHE_DIR):
+    """
+    Charge une calibration du cache.
+
+    Args:
+        kind: Type de calibration
+        key: Clé retournée par calibration_key
+        cache_dir: Dossier du cache
+    Returns:
+        Dictionnaire nom -> tableau, ou None si la calibration n'est pas dans le cache
+    """
+    path = cache_path(kind, key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    return load_npz_mmap(path)
+
+
+def save_calibration(kind, key, cache_dir=CACHE_DIR, **arrays):
+    """
+    Enregistre une calibration dans le cache.
+
+    Args:
+        kind: Type de calibration
+        key: Clé retournée par calibration_key
+        cache_dir: Dossier du cache
+        **arrays: Résultats de la calibration
+    Returns:
+        Le chemin du fichier écrit
+    """
+    path = cache_path(kind, key, cache_dir)
+    save_npz(path, **arrays)
+    return path
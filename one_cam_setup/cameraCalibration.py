@@ -1,28 +1,25 @@
 import cv2
 import numpy as np
 import glob
-import pickle
 import os
+import calibrationCache as cache
+import cornerDetection as cd
+import viewSelection as vs
+from undistortion import Undistorter
 
-def calibrate_camera():
+def calibrate_camera(preview=True, workers=None):
     """
     Calibre la caméra pour obtenir les paramètres optimaux.
 
     Args:
-        None
+        preview: Afficher les coins détectés sur chaque image (False : mode non interactif)
+        workers: Nombre de processus pour la détection des coins (défaut : nombre de coeurs)
     
     Returns:
         camera_matrix: Matrice de la caméra
         dist_coeffs: Coefficients de distorsion
     """
     
-    # Vérifier si une calibration existe déjà
-    if os.path.exists('camera_calibration.pkl'):
-        print("Calibration existante trouvée, chargement...")
-        with open('camera_calibration.pkl', 'rb') as f:
-            calibration_data = pickle.load(f)
-        return calibration_data['camera_matrix'], calibration_data['dist_coeffs']
-    
     # Critères de terminaison
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
     
@@ -35,7 +32,7 @@ def calibrate_camera():
     imgpoints = [] # Points 2D dans le plan image
     
     # Charger les images de calibration
-    images = glob.glob('calibration_images/*.jpg')
+    images = sorted(glob.glob('calibration_images/*.jpg'))
     
     if len(images) == 0:
         print("Aucune image de calibration trouvée dans 'calibration_images/'")
@@ -47,31 +44,44 @@ def calibrate_camera():
         dist_coeffs = np.array([0.1, -0.2, 0, 0, 0], dtype=np.float32)
         return camera_matrix, dist_coeffs
     
+    # Vérifier si une calibration existe déjà pour ces images (clé : contenu des images et échiquier)
+    cache_key = cache.calibration_key("mono", images, (7, 4), extra=["select_views", vs.DEFAULT_MIN_DISTANCE])
+    calibration_data = cache.load_calibration("mono", cache_key)
+    if calibration_data is not None:
+        print("Calibration existante trouvée, chargement...")
+        return calibration_data['camera_matrix'], calibration_data['dist_coeffs']
+    
     print(f"Traitement de {len(images)} images de calibration...")
     
-    for fname in images:
-        img = cv2.imread(fname)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Trouver les coins de l'échiquier
-        ret, corners = cv2.findChessboardCorners(gray, (7,4), None)
-        
+    # Détection des coins de l'échiquier, en parallèle
+    detections = cd.detect_corners(images, (7,4), criteria, workers=workers)
+    
+    image_size = None
+    found_images = []
+    for fname, (ret, corners2, size) in zip(images, detections):
         # Si trouvé, ajouter les points
-        if ret == True:
-            objpoints.append(objp)
-            
-            # Affiner la position des coins
-            corners2 = cv2.cornerSubPix(gray, corners, (11,11), (-1,-1), criteria)
+        if ret:
+            found_images.append(fname)
             imgpoints.append(corners2)
+            image_size = size
             
             # Dessiner et afficher les coins (optionnel)
-            cv2.drawChessboardCorners(img, (7,4), corners2, ret)
-            cv2.imshow('Corners détectés', img)
-            cv2.waitKey(100)
+            if preview:
+                cd.preview_corners(fname, (7,4), corners2)
         else:
             print(f"Échec détection échiquier dans {fname}")
-    
-    cv2.destroyAllWindows()
+
+    # Suppression des vues redondantes (échiquier presque à la même position)
+    kept = vs.select_views(imgpoints, image_size)
+    imgpoints = [imgpoints[i] for i in kept]
+    objpoints = [objp] * len(imgpoints)
+    if len(kept) < len(found_images):
+        print(f"{len(kept)}/{len(found_images)} vues conservées (les autres sont redondantes):")
+        for i in kept:
+            print(f"  {found_images[i]}")
+    
+    if preview:
+        cv2.destroyAllWindows()
     
     if len(objpoints) == 0:
         print("Aucun échiquier détecté dans les images!")
@@ -86,7 +96,7 @@ def calibrate_camera():
     
     # Calibration de la caméra
     ret, camera_matrix, dist_coeffs, rvecs, tvecs = cv2.calibrateCamera(
-        objpoints, imgpoints, gray.shape[::-1], None, None)
+        objpoints, imgpoints, image_size, None, None)
     
     if ret:
         print("Calibration réussie!")
@@ -95,16 +105,13 @@ def calibrate_camera():
         print(f"Coefficients de distorsion: {dist_coeffs.ravel()}")
         
         # Sauvegarder la calibration
-        calibration_data = {
-            'camera_matrix': camera_matrix,
-            'dist_coeffs': dist_coeffs,
-            'reprojection_error': ret
-        }
+        path = cache.save_calibration("mono", cache_key,
+                                      camera_matrix=camera_matrix,
+                                      dist_coeffs=dist_coeffs,
+                                      reprojection_error=np.float64(ret),
+                                      kept_images=np.array([found_images[i] for i in kept]))
         
-        with open('camera_calibration.pkl', 'wb') as f:
-            pickle.dump(calibration_data, f)
-        
-        print("Calibration sauvegardée dans 'camera_calibration.pkl'")
+        print(f"Calibration sauvegardée dans '{path}'")
         
         return camera_matrix, dist_coeffs
     else:
@@ -128,6 +135,7 @@ def test_calibration():
     """
 
     camera_matrix, dist_coeffs = calibrate_camera()
+    undistorter = Undistorter(camera_matrix, dist_coeffs, mode="remap")
     
     cap = cv2.VideoCapture(0)
     
@@ -139,12 +147,8 @@ def test_calibration():
         # Image non corrigée
         h, w = frame.shape[:2]
         
-        # Nouvelle matrice de caméra pour l'image corrigée
-        newcameramtx, roi = cv2.getOptimalNewCameraMatrix(
-            camera_matrix, dist_coeffs, (w,h), 1, (w,h))
-        
-        # Correction de la distorsion
-        undistorted = cv2.undistort(frame, camera_matrix, dist_coeffs, None, newcameramtx)
+        # Correction de la distorsion (tables calculées à la première frame)
+        undistorted = undistorter.undistort_frame(frame)
         
         # Affichage côte à côte
         combined = np.hstack((frame, undistorted))
@@ -0,0 +1,182 @@
+import cv2
+import hashlib
+import json
+import os
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+# Importation des fonctions locales
+import calibrationCache as cache
+
+"""
+Détection des coins de l'échiquier pour la calibration, en parallèle.
+
+Chaque image est traitée par un processus du pool : l'échiquier est d'abord cherché sur une copie
+réduite de l'image, puis les coins sont affinés (cornerSubPix) sur l'image en pleine résolution,
+uniquement autour des coins trouvés. Si l'échiquier n'est pas trouvé sur la copie réduite, la
+recherche est refaite en pleine résolution.
+
+Le résultat de chaque image est conservé sur le disque (calibration_cache/corners), adressé par le
+hash du contenu de l'image et les paramètres de détection : les calibrations mono et stéréo qui
+utilisent les mêmes images ne les décodent et ne les analysent qu'une seule fois, y compris d'une
+exécution à l'autre.
+"""
+
+# Critères de terminaison par défaut de cornerSubPix
+DEFAULT_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+# Plus grande dimension de la copie réduite utilisée pour localiser l'échiquier
+DETECTION_MAX_SIDE = 640
+
+# Sous-dossier du cache où sont conservés les coins détectés
+CORNER_STORE = "corners"
+
+
+def _init_worker():
+    # Un seul thread OpenCV par processus : le parallélisme vient du pool
+    cv2.setNumThreads(1)
+
+
+def find_board(gray, board_size, criteria=DEFAULT_CRITERIA, max_side=DETECTION_MAX_SIDE, win_size=(11, 11)):
+    """
+    Cherche l'échiquier sur une copie réduite puis affine les coins en pleine résolution.
+
+    Args:
+        gray: Image en niveaux de gris
+        board_size: Nombre de coins internes de l'échiquier
+        criteria: Critères de terminaison de cornerSubPix
+        max_side: Plus grande dimension de la copie réduite
+        win_size: Demi-taille de la fenêtre de recherche de cornerSubPix
+    Returns:
+        (trouvé, coins (N, 1, 2) float32 ou None)
+    """
+    h, w = gray.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+
+    found, corners = False, None
+    if scale < 1.0:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        found, corners = cv2.findChessboardCorners(small, board_size, None)
+        if found:
+            # Retour aux coordonnées de l'image en pleine résolution (centres des pixels)
+            corners = ((corners + 0.5) / scale - 0.5).astype(np.float32)
+
+    if not found:
+        found, corners = cv2.findChessboardCorners(gray, board_size, None)
+
+    if not found:
+        return False, None
+
+    corners = cv2.cornerSubPix(gray, corners, win_size, (-1, -1), criteria)
+    return True, corners
+
+
+def _detect_file(task):
+    path, board_size, criteria, max_side = task
+    gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return False, None, None
+    found, corners = find_board(gray, board_size, criteria, max_side)
+    return found, corners, (gray.shape[1], gray.shape[0])
+
+
+def _detect_files(image_paths, board_size, criteria, workers, max_side):
+    tasks = [(path, tuple(board_size), criteria, max_side) for path in image_paths]
+
+    if workers == 1 or len(tasks) <= 1:
+        return [_detect_file(task) for task in tasks]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+        return list(executor.map(_detect_file, tasks))
+
+
+def _store_path(cache_dir, board_size, criteria, max_side, digest):
+    params = json.dumps([list(board_size), list(criteria), max_side]).encode()
+    params_key = hashlib.sha256(params).hexdigest()[:12]
+    return os.path.join(cache_dir, CORNER_STORE, f"{params_key}_{digest[:32]}.npz")
+
+
+def _load_detection(path):
+    if not os.path.exists(path):
+        return None
+    arrays = cache.load_npz_mmap(path)
+    found = bool(arrays["found"])
+    corners = np.array(arrays["corners"]) if found else None
+    size = tuple(int(v) for v in arrays["size"])
+    return found, corners, size
+
+
+def _save_detection(path, detection):
+    found, corners, size = detection
+    if corners is None:
+        corners = np.empty((0, 1, 2), dtype=np.float32)
+    cache.save_npz(path, found=np.bool_(found), corners=corners, size=np.array(size, dtype=np.int64))
+
+
+def detect_corners(image_paths, board_size, criteria=DEFAULT_CRITERIA, workers=None, max_side=DETECTION_MAX_SIDE,
+                   cache_dir=cache.CACHE_DIR):
+    """
+    Détecte l'échiquier dans une liste d'images, en parallèle. Seules les images absentes du cache des
+    coins sont lues et analysées.
+
+    Args:
+        image_paths: Chemins des images
+        board_size: Nombre de coins internes de l'échiquier
+        criteria: Critères de terminaison de cornerSubPix
+        workers: Nombre de processus (défaut : nombre de coeurs, 1 : pas de pool)
+        max_side: Plus grande dimension de la copie réduite
+        cache_dir: Dossier du cache (None : pas de cache)
+    Returns:
+        Liste de tuples (trouvé, coins (N, 1, 2) float32 ou None, taille de l'image (w, h) ou None),
+        dans l'ordre de image_paths
+    """
+    if cache_dir is None:
+        return _detect_files(image_paths, board_size, criteria, workers, max_side)
+
+    # Images déjà analysées (même contenu, mêmes paramètres)
+    digests = cache.file_digests(image_paths, cache_dir)
+    detections = {}
+    missing = {}
+    for path, digest in zip(image_paths, digests):
+        if digest in detections or digest in missing:
+            continue
+        detection = _load_detection(_store_path(cache_dir, board_size, criteria, max_side, digest))
+        if detection is None:
+            missing[digest] = path
+        else:
+            detections[digest] = detection
+
+    # Détection des autres, en parallèle
+    results = _detect_files(list(missing.values()), board_size, criteria, workers, max_side)
+    for digest, detection in zip(missing, results):
+        detections[digest] = detection
+        # Une image illisible n'est pas conservée
+        if detection[2] is not None:
+            _save_detection(_store_path(cache_dir, board_size, criteria, max_side, digest), detection)
+
+    return [detections[digest] for digest in digests]
+
+
+def preview_corners(image_path, board_size, corners, window_name='Corners détectés', delay=100, label=None):
+    """
+    Affiche les coins détectés sur une image (mode interactif).
+
+    Args:
+        image_path: Chemin de l'image
+        board_size: Nombre de coins internes de l'échiquier
+        corners: Coins détectés
+        window_name: Nom de la fenêtre
+        delay: Durée d'affichage en millisecondes
+        label: Texte affiché en haut à gauche
+    Returns:
+        L'image annotée
+    """
+    img = cv2.imread(image_path)
+    cv2.drawChessboardCorners(img, board_size, corners, True)
+    if label:
+        cv2.putText(img, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    if window_name:
+        cv2.imshow(window_name, img)
+        cv2.waitKey(delay)
+    return img
@@ -1,10 +1,14 @@
 import cv2
-import mediapipe as mp
 import time
-import json
+import argparse
 # Importation des fonctions locales
 import positionFunctions as pf # Importation de la fonction locale. (positionFunctions.py)
 import cameraCalibration as cc # Importation de la fonction de calibration de la caméra.
+from poseTracker import PoseTracker # Détection de la pose (modèle, calibration, traitement d'une frame).
+from undistortion import Undistorter # Correction de la distorsion (tables précalculées).
+from pipeline import DetectionPipeline # Pipeline capture -> inférence -> affichage en threads.
+from recording import RecordingWriter, FLAG_PROPAGATED # Écriture des enregistrements en continu.
+from keypointFlow import FlowTracker # Propagation par flux optique entre deux inférences.
 
 
 # Sélection des os à afficher
@@ -31,177 +35,287 @@ selected_landmarks = [
     29, 30
 ]
 
-# Initialisation de la fenêtre d'affichage
-cv2.namedWindow("Detection", cv2.WINDOW_NORMAL)
-cv2.resizeWindow("Detection", 1280, 720)  # Redimensionnement de la fenêtre
-cv2.startWindowThread()
+# Mode de correction de la distorsion :
+# "remap" : correction de l'image complète avec des tables précalculées.
+# "points" : pas de correction de l'image, seuls les landmarks sélectionnés sont corrigés (beaucoup plus rapide).
+undistortion_mode = "remap"
 
-# Initialisation de MediaPipe pour la détection de pose
-mp_pose = mp.solutions.pose # Initialisation du modèle de pose
-pose = mp_pose.Pose()
+# Une inférence MediaPipe toutes les N frames, les articulations sont propagées par flux optique entre deux.
+# 1 : inférence sur chaque frame.
+inference_interval = 1
 
-# Initialisation de la webcam
-cap = cv2.VideoCapture(0)
 
-"""
-# Pour augementer la résolution de la webcam. Impact significatif sur les FPS.
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)  # Définir la largeur
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)  # Définir la hauteur
-"""
+def process_frame(tracker, frame):
+    """
+    Traitement d'une frame : correction de la distorsion, détection de la pose et extraction des coordonnées 3D.
 
-# Variable utilisée pour le calcul des FPS
-pTime = 0
+    Args:
+        tracker: Le FlowTracker
+        frame: L'image BGR de la webcam
+    Returns:
+        (image BGR corrigée, tableau (33, 4) des landmarks dans l'image ou None,
+         tableau (17, 4) des coordonnées 3D ou None, indicateurs de la frame pour l'enregistrement)
+    """
+    body_coordinates_3d = tracker.process(frame)
+    flags = FLAG_PROPAGATED if tracker.propagated else 0
+    return tracker.frame, tracker.image_landmarks, body_coordinates_3d, flags
 
-# Calibration de la caméra (Using the cameraCalibration module)
-camera_matrix, dist_coeffs = cc.calibrate_camera()
 
-# Liste pour stocker les données d'animations
-animation_data = []
-frame_count = 0
+def render_frame(image, image_landmarks, body_coordinates_3d, flags, connections, state, capture_time):
+    """
+    Dessine les landmarks et les informations sur l'image, et enregistre la frame si l'enregistrement est actif.
 
-# Varaible pour contrôler l'enregistrement des frames
-recording = False
-recording_start_time = 0
+    Args:
+        image: L'image BGR sur laquelle dessiner
+        image_landmarks: Le tableau (33, 4) des landmarks dans l'image (ou None)
+        connections: Les connexions entre les landmarks
+        body_coordinates_3d: Le tableau (17, 4) des coordonnées 3D extraites (ou None)
+        flags: Indicateurs de la frame (inférée ou propagée)
+        state: Dictionnaire de l'état de l'enregistrement
+        capture_time: Instant de capture de la frame (time.perf_counter)
+    Returns:
+        None
+    """
+    # Dessiner les landmarks de la pose
+    if image_landmarks is not None:
+        # Pour le squelette complet (fourni par MediaPipe)
+        # mp_drawing.draw_landmarks(image, results.pose_landmarks, connections)
+
+        # Pour dessiner notre sélection d'os
+        pf.draw_selected_landmark_array(image, image_landmarks, connections, selected_landmarks)
+
+         # N'exporter les données que si l'enregistrement est actif
+        if state["recording"]:
+            # Temps de capture depuis la première frame enregistrée : le débit varie avec la charge de
+            # l'inférence, la relecture se base sur ces temps plutôt que sur le numéro de frame
+            if state["recording_start_time"] is None:
+                state["recording_start_time"] = capture_time
+            elapsed_time = capture_time - state["recording_start_time"]
+
+            # Export au format blender, écrit sur le disque en arrière-plan
+            state["writer"].write(pf.blender_bone_array(body_coordinates_3d), state["frame_count"], elapsed_time, flags)
+            # Incrémenter le compteur de frames uniquement pendant l'enregistrement
+            state["frame_count"] += 1
+            mins, secs = divmod(int(elapsed_time), 60)
+            time_text = f"REC {mins:02d}:{secs:02d}"
+            cv2.putText(image, time_text, (image.shape[1] - 150, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+            # Afficher un indicateur d'enregistrement clignotant
+            if int(elapsed_time) % 2 == 0:  # Clignote toutes les secondes
+                cv2.circle(image, (image.shape[1] - 170, 25), 10, (0, 0, 255), -1)
+
+        # Pourcentage de points clés visibles
+        visibility_percentage = pf.visibility_percentage(body_coordinates_3d)
+
+        # Afficher le pourcentage de visibilité
+        visibility_text = f"Visibility: {int(visibility_percentage)}%"
+        cv2.putText(image, visibility_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        # Avertissement si moins de 90% des points sont visibles
+        if visibility_percentage < 90:
+            warning_text = "WARNING: Not enough visibility!"
+            text_size = cv2.getTextSize(warning_text, cv2.FONT_HERSHEY_SIMPLEX, 0.9, 2)[0]
+            text_x = (image.shape[1] - text_size[0]) // 2  # Centre horizontalement
+
+            # Afficher l'avertissement en rouge et en gras
+            cv2.putText(image, warning_text, (text_x, 120),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+
+
+    # Affichage du statut d'enregistrement
+    if not state["recording"]:
+        status_text = "Press 'r' to start recording an animation"
+        cv2.putText(image, status_text, (10, image.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+
+def handle_key(key, state):
+    """
+    Gère les touches du clavier.
+
+    Args:
+        key: Le code de la touche pressée
+        state: Dictionnaire de l'état de l'enregistrement
+    Returns:
+        False si l'utilisateur demande à quitter, True sinon
+    """
+    # 'r' pour démarrer/arrêter l'enregistrement
+    if key == ord('r'):
+        state["recording"] = not state["recording"]
+        if state["recording"]:
+            filename = f"animation_data_{time.strftime('%Y%m%d_%H%M%S')}.skrec"
+            state["writer"] = RecordingWriter(filename, pf.BLENDER_BONE_NAMES)
+            state["frame_count"] = 0
+            state["recording_start_time"] = None  # Fixé par l'instant de capture de la première frame
+            print("Enregistrement démarré...")
+        else:
+            # Les frames sont déjà sur le disque : l'arrêt ne bloque pas la capture
+            writer = state.pop("writer")
+            writer.close()
+            print(f"Enregistrement arrêté. Animation sauvegardée dans '{writer.filename}' avec {state['frame_count']} frames")
+
+    # 'q' pour quitter
+    elif key == ord('q'):
+        return False
+
+    return True
+
+
+def run_sequential(cap, tracker, state):
+    """
+    Boucle de détection séquentielle : capture, inférence et affichage s'enchaînent sur un seul thread.
+
+    Args:
+        cap: La webcam
+        tracker: Le FlowTracker
+        state: Dictionnaire de l'état de l'enregistrement
+    Returns:
+        None
+    """
+    # Variable utilisée pour le calcul des FPS
+    pTime = 0
 
-with pose:
     while cap.isOpened():
 
         # Lire une image de la webcam
         ret, frame = cap.read()
+        capture_time = time.perf_counter()
 
         # Dans le cas où webcan inaccessible.
         if not ret:
             print("Erreur lecture webcam")
             break
-        
-        # Correction de la distorsion avec les paramètres de calibration
-        h, w = frame.shape[:2]
-        newcameramtx, roi = cv2.getOptimalNewCameraMatrix(
-            camera_matrix, dist_coeffs, (w, h), 1, (w, h))
-        
-        # Appliquer la correction de distorsion
-        frame = cv2.undistort(frame, camera_matrix, dist_coeffs, None, newcameramtx)
-
-        """
-        # Bout de code optionnel : recadrer le résultat pour supprimer les pixels noirs
-        # Entre commentaires pour l'activer si nécessaire.
-        
-        x, y, w, h = roi
-        if all(val > 0 for val in [x, y, w, h]):  # Vérifier que ROI est valide
-            undistorted_frame = undistorted_frame[y:y+h, x:x+w]
-            # Redimensionner si nécessaire pour maintenir la taille d'origine
-            undistorted_frame = cv2.resize(undistorted_frame, (frame.shape[1], frame.shape[0]))
-        
-        # Utiliser l'image corrigée pour la suite du traitement
-        frame = undistorted_frame
-        """
-
-        # Conversion de l'image pour MediaPipe
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image)
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-        
+
+        image, image_landmarks, body_coordinates_3d, flags = process_frame(tracker, frame)
+
         # Affichage du FPS -> Idée sur la performance de la détection.
         cTime = time.time() # Temps actuel
         fps = 1 / (cTime - pTime) # Calcul des FPS
         pTime = cTime # MAJ du temps précédent
         cv2.putText(image, f"FPS: {int(fps)}", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
-        
-        # Dessiner les landmarks de la pose
-        if results.pose_landmarks:
-            # Pour le squelette complet (fourni par MediaPipe)
-            # mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-
-            # Pour dessiner notre sélection d'os
-            pf.draw_selected_landmarks(image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS, selected_landmarks)
-
-            # Extraction des coordonnées utilisables.
-            body_coordinates_3d = pf.extract_body_coordinates_3d(
-                results.pose_landmarks, 
-                image.shape, 
-                camera_matrix
-            )
-
-             # N'exporter les données que si l'enregistrement est actif
-            if recording:
-                # Export au format blender
-                blender_frame_data = pf.export_to_blender_format(body_coordinates_3d, frame_count)
-                animation_data.append(blender_frame_data)
-                # Incrémenter le compteur de frames uniquement pendant l'enregistrement
-                frame_count += 1
-                
-                # Afficher la durée d'enregistrement
-                elapsed_time = time.time() - recording_start_time
-                mins, secs = divmod(int(elapsed_time), 60)
-                time_text = f"REC {mins:02d}:{secs:02d}"
-                cv2.putText(image, time_text, (image.shape[1] - 150, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Afficher un indicateur d'enregistrement clignotant
-                if int(elapsed_time) % 2 == 0:  # Clignote toutes les secondes
-                    cv2.circle(image, (image.shape[1] - 170, 25), 10, (0, 0, 255), -1)
-
-            # Vérifier la visibilité des points clés
-            visible_points = 0
-            total_points = len(body_coordinates_3d)
-            
-            # Parcourir les points clés pour compter ceux qui sont visibles 
-            for point_name, point_data in body_coordinates_3d.items():
-                # MediaPipe considère un point comme "visible" si sa visibilité est > 0.5
-                if point_data["visibility"] > 0.5:
-                    visible_points += 1
-            
-            # Calculer le pourcentage de visibilité
-            visibility_percentage = (visible_points / total_points) * 100
-            
-            # Afficher le pourcentage de visibilité
-            visibility_text = f"Visibility: {int(visibility_percentage)}%"
-            cv2.putText(image, visibility_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Avertissement si moins de 90% des points sont visibles
-            if visibility_percentage < 90:
-                warning_text = "WARNING: Not enough visibility!"
-                text_size = cv2.getTextSize(warning_text, cv2.FONT_HERSHEY_SIMPLEX, 0.9, 2)[0]
-                text_x = (image.shape[1] - text_size[0]) // 2  # Centre horizontalement
-                
-                # Afficher l'avertissement en rouge et en gras
-                cv2.putText(image, warning_text, (text_x, 120), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-                
-
-        # Affichage du statut d'enregistrement
-        if not recording:
-            status_text = "Press 'r' to start recording an animation"
-            cv2.putText(image, status_text, (10, image.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
+
+        render_frame(image, image_landmarks, body_coordinates_3d, flags, tracker.connections, state, capture_time)
+
         # Affichage des coordonnées des points sur l'image.
         cv2.imshow("Detection", image)
 
-
         # Gérer les touches
         key = cv2.waitKey(1) & 0xFF
-        
-        # 'r' pour démarrer/arrêter l'enregistrement
-        if key == ord('r'):
-            recording = not recording
-            if recording:
-                recording_start_time = time.time()
-                print("Enregistrement démarré...")
-            else:
-                print(f"Enregistrement arrêté. {len(animation_data)} frames capturées.")
-                    # Demander à l'utilisateur un nom pour le fichier
-                filename = f"animation_data_{time.strftime('%Y%m%d_%H%M%S')}.json"
-                
-                with open(filename, 'w') as f:
-                    json.dump(animation_data, f, indent=2)
-                
-                print(f"Animation sauvegardée dans '{filename}' avec {len(animation_data)} frames")
-        
-        # 'q' pour quitter
-        elif key == ord('q'):
+        if not handle_key(key, state):
             break
 
-#Stop l'utilisation de la webcam et ferme les fenêtres
-cap.release()
-cv2.destroyAllWindows()
-cv2.waitKey(1)
\ No newline at end of file
+
+def run_pipelined(cap, tracker, state):
+    """
+    Boucle de détection en pipeline : la capture et l'inférence tournent dans leurs propres threads,
+    ce thread s'occupe de l'affichage et de l'enregistrement. Les temps de capture, d'inférence et
+    d'affichage se recouvrent au lieu de s'additionner.
+
+    Args:
+        cap: La webcam
+        tracker: Le FlowTracker
+        state: Dictionnaire de l'état de l'enregistrement
+    Returns:
+        None
+    """
+    pipeline = DetectionPipeline(cap, lambda frame: process_frame(tracker, frame)).start()
+
+    try:
+        while pipeline.running:
+            item = pipeline.get()
+            if item is None:
+                # Garder la fenêtre réactive en attendant l'inférence
+                if not handle_key(cv2.waitKey(1) & 0xFF, state):
+                    break
+                continue
+
+            _, capture_time, _, (image, image_landmarks, body_coordinates_3d, flags) = item
+
+            # Affichage du débit réel et de la latence capture -> landmarks
+            fps = pipeline.stats.throughput()
+            latency, _ = pipeline.stats.latency()
+            cv2.putText(image, f"FPS: {int(fps)} | Latence: {latency * 1000:.0f} ms", (10, 70),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 255), 2)
+
+            render_frame(image, image_landmarks, body_coordinates_3d, flags, tracker.connections, state, capture_time)
+
+            cv2.imshow("Detection", image)
+
+            key = cv2.waitKey(1) & 0xFF
+            if not handle_key(key, state):
+                break
+    finally:
+        pipeline.stop()
+
+    # Une erreur d'inférence arrête le pipeline : la remonter au lieu de terminer normalement
+    if pipeline.error is not None:
+        raise pipeline.error
+
+    latency, max_latency = pipeline.stats.latency()
+    print(f"Débit: {pipeline.stats.throughput():.1f} FPS | Latence moyenne: {latency * 1000:.1f} ms "
+          f"(max {max_latency * 1000:.1f} ms) | Frames abandonnées: {pipeline.frames.dropped + pipeline.results.dropped}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection de la pose depuis la webcam.")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Capture, inférence et affichage dans des threads séparés")
+    parser.add_argument("--undistort", choices=Undistorter.MODES, default=undistortion_mode,
+                        help="Mode de correction de la distorsion")
+    parser.add_argument("--roi", action="store_true",
+                        help="Donner à MediaPipe uniquement la région autour de la personne")
+    parser.add_argument("--infer-every", type=int, default=inference_interval,
+                        help="Une inférence toutes les N frames, flux optique entre deux")
+    args = parser.parse_args()
+
+    # Initialisation de la fenêtre d'affichage
+    cv2.namedWindow("Detection", cv2.WINDOW_NORMAL)
+    cv2.resizeWindow("Detection", 1280, 720)  # Redimensionnement de la fenêtre
+    cv2.startWindowThread()
+
+    # Initialisation de la webcam
+    cap = cv2.VideoCapture(0)
+
+    """
+    # Pour augementer la résolution de la webcam. Impact significatif sur les FPS.
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)  # Définir la largeur
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)  # Définir la hauteur
+    """
+
+    # Calibration de la caméra (Using the cameraCalibration module)
+    camera_matrix, dist_coeffs = cc.calibrate_camera()
+
+    # Initialisation de MediaPipe pour la détection de pose
+    pose_tracker = PoseTracker(camera_matrix, dist_coeffs, undistortion_mode=args.undistort, roi=args.roi)
+    tracker = FlowTracker(pose_tracker, interval=args.infer_every)
+
+    # État de l'enregistrement : compteur de frames et contrôle de l'enregistrement
+    state = {
+        "frame_count": 0,
+        "recording": False,
+        "recording_start_time": None,
+    }
+
+    try:
+        with tracker:
+            if args.pipeline:
+                run_pipelined(cap, tracker, state)
+            else:
+                run_sequential(cap, tracker, state)
+    finally:
+        # Terminer un enregistrement encore en cours, même en cas d'erreur ou de Ctrl+C : le thread
+        # d'écriture (non démon) empêcherait sinon le programme de se terminer
+        if "writer" in state:
+            state.pop("writer").close(wait=True)
+
+    if tracker.interval > 1:
+        print(f"Frames inférées: {tracker.inferred_count} | Frames propagées: {tracker.propagated_count}")
+
+    #Stop l'utilisation de la webcam et ferme les fenêtres
+    cap.release()
+    cv2.destroyAllWindows()
+    cv2.waitKey(1)
+
+
+if __name__ == "__main__":
+    main()
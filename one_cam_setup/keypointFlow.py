@@ -0,0 +1,164 @@
+import cv2
+import numpy as np
+# Importation des fonctions locales
+import positionFunctions as pf
+
+
+class FlowTracker:
+    """
+    Inférence MediaPipe décimée : l'inférence complète n'est faite que toutes les `interval` frames.
+    Entre deux inférences, les articulations sélectionnées sont propagées par flux optique
+    (Lucas-Kanade pyramidal), ce qui coûte une fraction du temps d'une inférence.
+
+    Une inférence est refaite avant l'échéance dès que la propagation n'est plus fiable : mouvement
+    trop rapide, trop de points perdus (vérification aller-retour du flux) ou visibilité trop faible.
+
+    S'utilise comme un PoseTracker (process, frame, image_landmarks, connections). L'attribut
+    `propagated` indique si la dernière frame a été propagée ou inférée.
+    """
+
+    def __init__(self, tracker, interval=1, max_motion=0.05, max_lost=0.2, max_error=2.0,
+                 min_visibility=0.5, win_size=(21, 21), max_level=3):
+        """
+        Args:
+            tracker: Le PoseTracker utilisé pour les inférences
+            interval: Une inférence toutes les `interval` frames (1 : inférence sur chaque frame)
+            max_motion: Déplacement maximal d'un point entre deux frames (fraction de la largeur de l'image)
+            max_lost: Proportion maximale de points visibles perdus par le flux optique
+            max_error: Écart maximal (pixels) de la vérification aller-retour du flux optique
+            min_visibility: Visibilité moyenne minimale des articulations pour continuer la propagation
+            win_size: Taille de la fenêtre de recherche de Lucas-Kanade
+            max_level: Nombre de niveaux de la pyramide de Lucas-Kanade
+        """
+        self.tracker = tracker
+        self.interval = max(1, int(interval))
+        self.max_motion = max_motion
+        self.max_lost = max_lost
+        self.max_error = max_error
+        self.min_visibility = min_visibility
+        self._lk_params = {
+            "winSize": win_size,
+            "maxLevel": max_level,
+            "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01),
+        }
+
+        # Dernière frame utilisée comme référence du flux optique
+        self._prev_gray = None
+        self._prev_landmarks = None
+        self._since_inference = 0
+
+        # Résultats de la dernière frame traitée (mêmes attributs que PoseTracker)
+        self.frame = None
+        self.image_landmarks = None
+        self.landmark_array = None
+        self.propagated = False
+
+        self.inferred_count = 0
+        self.propagated_count = 0
+
+    @property
+    def connections(self):
+        """Les connexions entre les landmarks."""
+        return self.tracker.connections
+
+    def process(self, frame):
+        """
+        Calcule les coordonnées 3D des articulations sélectionnées, par inférence ou par propagation.
+
+        Args:
+            frame: Image BGR
+        Returns:
+            Tableau (17, 4) des coordonnées 3D (x, y, z, visibilité), ou None si aucune personne détectée
+        """
+        # Correction de la distorsion une seule fois (mode "remap"), même si la propagation est refusée
+        if self.tracker.undistorter is not None:
+            frame = self.tracker.undistorter.undistort_frame(frame)
+
+        if self._prev_landmarks is not None and self._since_inference < self.interval:
+            body_array = self._propagate(frame)
+            if body_array is not None:
+                return body_array
+        return self._infer(frame)
+
+    def _infer(self, frame):
+        tracker = self.tracker
+        body_array = tracker.process(frame, undistorted=True)
+
+        self.frame = tracker.frame
+        self.image_landmarks = tracker.image_landmarks
+        self.landmark_array = tracker.landmark_array
+        self.propagated = False
+        self.inferred_count += 1
+        self._since_inference = 1
+
+        # Référence du flux optique pour les frames suivantes
+        self._prev_landmarks = None
+        if self.interval > 1 and self._reliable(self.image_landmarks):
+            self._prev_gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+            self._prev_landmarks = self.image_landmarks
+
+        return body_array
+
+    def _reliable(self, landmark_array):
+        if landmark_array is None:
+            return False
+        return landmark_array[pf.SELECTED_INDICES, 3].mean() >= self.min_visibility
+
+    def _propagate(self, frame):
+        tracker = self.tracker
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        landmarks = self._prev_landmarks
+        previous = (landmarks[pf.SELECTED_INDICES, :2] * (w, h)).astype(np.float32).reshape(-1, 1, 2)
+
+        # Flux aller puis retour : un point bien suivi revient à sa position de départ
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, previous, None, **self._lk_params)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, points, None, **self._lk_params)
+        error = np.linalg.norm((back - previous).reshape(-1, 2), axis=1)
+        tracked = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.max_error)
+
+        # Trop de points visibles perdus : inférence
+        visible = landmarks[pf.SELECTED_INDICES, 3] >= self.min_visibility
+        if np.count_nonzero(visible & ~tracked) > self.max_lost * np.count_nonzero(visible):
+            return None
+
+        # Mouvement trop rapide pour le flux optique : inférence
+        motion = np.linalg.norm((points - previous).reshape(-1, 2)[tracked], axis=1)
+        if motion.size and motion.max() > self.max_motion * w:
+            return None
+
+        image_landmarks = landmarks.copy()
+        image_landmarks[pf.SELECTED_INDICES[tracked], :2] = points.reshape(-1, 2)[tracked] / (w, h)
+        image_landmarks[pf.SELECTED_INDICES[~tracked], 3] = 0.0
+        if not self._reliable(image_landmarks):
+            return None
+
+        # Correction de la distorsion des landmarks (mode "points") et suivi de la région d'intérêt
+        landmark_array = image_landmarks
+        if tracker.undistorter is not None:
+            landmark_array = tracker.undistorter.undistort_landmark_array(
+                image_landmarks, frame.shape, pf.SELECTED_INDICES)
+        if tracker.roi_tracker is not None:
+            tracker.roi_tracker.update(image_landmarks, frame.shape, pf.SELECTED_INDICES)
+
+        self._prev_gray = gray
+        self._prev_landmarks = image_landmarks
+        self._since_inference += 1
+
+        self.frame = frame
+        self.image_landmarks = image_landmarks
+        self.landmark_array = landmark_array
+        self.propagated = True
+        self.propagated_count += 1
+
+        return tracker.body_array(landmark_array, frame.shape)
+
+    def close(self):
+        """Libère le modèle MediaPipe."""
+        self.tracker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+from collections import deque
+
+
+class LatestFrameQueue:
+    """
+    File bornée entre deux étages du pipeline.
+    Quand la file est pleine, l'élément le plus ancien est supprimé : la dernière frame gagne.
+    La latence ne s'accumule donc pas quand l'étage suivant est plus lent que le précédent.
+    """
+
+    def __init__(self, maxsize=1):
+        """
+        Args:
+            maxsize: Nombre maximum d'éléments en attente
+        """
+        self._queue = queue.Queue(maxsize)
+        self.dropped = 0  # Nombre de frames abandonnées
+
+    def put(self, item):
+        """
+        Ajoute un élément, en supprimant le plus ancien si la file est pleine.
+
+        Args:
+            item: L'élément à ajouter
+        Returns:
+            None
+        """
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """
+        Retire l'élément le plus ancien.
+
+        Args:
+            timeout: Temps d'attente maximum en secondes (None = attente infinie)
+        Returns:
+            L'élément retiré
+        Raises:
+            queue.Empty si aucun élément n'est disponible avant le timeout
+        """
+        return self._queue.get(timeout=timeout)
+
+
+class PipelineStats:
+    """
+    Mesure du débit réel et de la latence capture -> landmarks sur une fenêtre glissante.
+    """
+
+    def __init__(self, window=120):
+        """
+        Args:
+            window: Nombre de frames prises en compte dans les mesures
+        """
+        self._lock = threading.Lock()
+        self._done_times = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self.frames = 0
+
+    def add(self, capture_time, done_time):
+        """
+        Enregistre une frame traitée.
+
+        Args:
+            capture_time: Instant de capture (time.perf_counter)
+            done_time: Instant où les landmarks sont disponibles (time.perf_counter)
+        Returns:
+            None
+        """
+        with self._lock:
+            self._done_times.append(done_time)
+            self._latencies.append(done_time - capture_time)
+            self.frames += 1
+
+    def throughput(self):
+        """
+        Returns:
+            Le nombre de frames traitées par seconde
+        """
+        with self._lock:
+            if len(self._done_times) < 2:
+                return 0.0
+            elapsed = self._done_times[-1] - self._done_times[0]
+            return (len(self._done_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def latency(self):
+        """
+        Returns:
+            (latence moyenne, latence maximale) en secondes
+        """
+        with self._lock:
+            if not self._latencies:
+                return 0.0, 0.0
+            return sum(self._latencies) / len(self._latencies), max(self._latencies)
+
+
+class DetectionPipeline:
+    """
+    Pipeline capture -> inférence -> affichage/enregistrement.
+
+    La capture et l'inférence tournent chacune dans leur propre thread, reliées par des files bornées
+    (LatestFrameQueue). L'étage d'affichage/enregistrement est le thread appelant : il récupère les
+    résultats avec get(), car les fenêtres OpenCV doivent être gérées depuis le thread principal.
+    """
+
+    def __init__(self, cap, process_frame, queue_size=1):
+        """
+        Args:
+            cap: La source vidéo (cv2.VideoCapture)
+            process_frame: Fonction appelée sur chaque frame par le thread d'inférence
+            queue_size: Taille des files entre les étages
+        """
+        self.cap = cap
+        self.process_frame = process_frame
+        self.frames = LatestFrameQueue(queue_size)
+        self.results = LatestFrameQueue(queue_size)
+        self.stats = PipelineStats()
+        self.error = None
+
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+
+    def start(self):
+        """Démarre les threads de capture et d'inférence."""
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Arrête les threads et attend leur fin."""
+        self._stop.set()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def get(self, timeout=0.1):
+        """
+        Récupère le dernier résultat disponible.
+
+        Args:
+            timeout: Temps d'attente maximum en secondes
+        Returns:
+            (numéro de frame, instant de capture, frame, résultat) ou None si aucun résultat
+        """
+        if self.error is not None:
+            raise self.error
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _capture_loop(self):
+        frame_number = 0
+        while not self._stop.is_set():
+            ret, frame = self.cap.read()
+            capture_time = time.perf_counter()
+
+            # Dans le cas où webcam inaccessible.
+            if not ret:
+                print("Erreur lecture webcam")
+                self._stop.set()
+                break
+
+            self.frames.put((frame_number, capture_time, frame))
+            frame_number += 1
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            try:
+                frame_number, capture_time, frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            try:
+                result = self.process_frame(frame)
+            except Exception as e:
+                self.error = e
+                self._stop.set()
+                break
+
+            self.stats.add(capture_time, time.perf_counter())
+            self.results.put((frame_number, capture_time, frame, result))
@@ -0,0 +1,263 @@
+import threading
+import cv2
+import numpy as np
+# Importation des fonctions locales
+import positionFunctions as pf
+from undistortion import Undistorter
+from roiTracking import RoiTracker
+
+
+class PoseTracker:
+    """
+    Détection de la pose sur une frame : correction de la distorsion, inférence MediaPipe et extraction
+    des coordonnées.
+
+    Le module mediapipe n'est importé qu'à la première inférence : importer ce module ne charge ni le
+    modèle, ni la webcam, ni aucune fenêtre. Un même tracker peut être partagé entre plusieurs threads.
+    Pour traiter plusieurs flux différents avec un seul modèle, utiliser static_image_mode=True (le
+    suivi d'une frame à l'autre de MediaPipe suppose un flux unique).
+    """
+
+    def __init__(self, camera_matrix=None, dist_coeffs=None, undistortion_mode="remap",
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 static_image_mode=False, model_complexity=1, roi=False):
+        """
+        Args:
+            camera_matrix: Matrice de la caméra (None : pas de correction ni de coordonnées 3D)
+            dist_coeffs: Coefficients de distorsion
+            undistortion_mode: Mode de correction de la distorsion ("remap" ou "points")
+            min_detection_confidence: Confiance minimale de détection de MediaPipe
+            min_tracking_confidence: Confiance minimale de suivi de MediaPipe
+            static_image_mode: Détection indépendante sur chaque image (pas de suivi)
+            model_complexity: Complexité du modèle MediaPipe (0, 1 ou 2)
+            roi: Donner à MediaPipe uniquement la région autour de la personne (voir RoiTracker)
+        """
+        self.undistorter = None
+        if camera_matrix is not None:
+            self.undistorter = Undistorter(camera_matrix, dist_coeffs, mode=undistortion_mode)
+
+        self._pose_options = {
+            "min_detection_confidence": min_detection_confidence,
+            "min_tracking_confidence": min_tracking_confidence,
+            "static_image_mode": static_image_mode,
+            "model_complexity": model_complexity,
+        }
+        self._pose = None
+        self._detector = None
+        self._lock = threading.Lock()
+        self.roi_tracker = RoiTracker() if roi else None
+        self._pose_framing = None  # Cadrage du suivi de self._pose : région, "full" (image complète) ou None
+
+        # Résultats de la dernière frame traitée
+        self.frame = None           # Image BGR traitée (corrigée en mode "remap")
+        self.results = None         # Résultats MediaPipe (dans la région d'intérêt en mode roi)
+        self.image_landmarks = None # Tableau (33, 4) des landmarks dans l'image traitée (pour le dessin)
+        self.landmark_array = None  # Tableau (33, 4) des landmarks corrigés, ou None si aucune personne détectée
+
+    @classmethod
+    def from_calibration(cls, **kwargs):
+        """
+        Crée un tracker avec la calibration de cameraCalibration.
+
+        Args:
+            **kwargs: Arguments transmis au constructeur
+        Returns:
+            Un PoseTracker
+        """
+        import cameraCalibration as cc
+        camera_matrix, dist_coeffs = cc.calibrate_camera()
+        return cls(camera_matrix, dist_coeffs, **kwargs)
+
+    @property
+    def pose(self):
+        """Le modèle MediaPipe Pose, créé au premier accès."""
+        if self._pose is None:
+            # Import différé : mediapipe ne coûte rien tant qu'aucune inférence n'est faite
+            import mediapipe as mp
+            self._pose = mp.solutions.pose.Pose(**self._pose_options)
+        return self._pose
+
+    @property
+    def detector(self):
+        """
+        Modèle MediaPipe Pose en mode image statique, créé au premier accès. En mode roi, il ne sert qu'à
+        retrouver une personne perdue, sur l'image complète, sans dépendre d'un suivi devenu invalide.
+        """
+        if self._pose_options["static_image_mode"]:
+            return self.pose
+        if self._detector is None:
+            import mediapipe as mp
+            self._detector = mp.solutions.pose.Pose(**dict(self._pose_options, static_image_mode=True))
+        return self._detector
+
+    def _model_for(self, roi):
+        # Personne perdue à la frame précédente : détection indépendante sur l'image complète
+        if roi is None and self.image_landmarks is None:
+            return self.detector
+
+        # Le modèle vidéo suit la personne (image complète ou région). Changement de cadrage : le suivi
+        # (région et lissage des landmarks) de la frame précédente est dans d'autres coordonnées, il
+        # est réinitialisé.
+        framing = roi if roi is not None else "full"
+        if framing != self._pose_framing:
+            if self._pose is not None and self._pose_framing is not None:
+                self._pose.reset()
+            self._pose_framing = framing
+        return self.pose
+
+    @property
+    def connections(self):
+        """Les connexions entre les landmarks (mp_pose.POSE_CONNECTIONS)."""
+        import mediapipe as mp
+        return mp.solutions.pose.POSE_CONNECTIONS
+
+    def warmup(self, image_shape=(480, 640, 3)):
+        """
+        Charge le modèle et exécute une première inférence sur une image noire.
+
+        Args:
+            image_shape: Les dimensions de l'image de chauffe
+        Returns:
+            None
+        """
+        self.detect(np.zeros(image_shape, dtype=np.uint8))
+
+    def detect(self, frame, undistorted=False):
+        """
+        Corrige la distorsion (mode "remap") et détecte la pose.
+
+        Args:
+            frame: Image BGR
+            undistorted: L'image est déjà corrigée (undistorter.undistort_frame)
+        Returns:
+            Tableau (33, 4) des landmarks normalisés (x, y, z, visibilité), ou None si aucune personne détectée
+        """
+        with self._lock:
+            # Correction de la distorsion avec les tables précalculées (mode "remap" uniquement)
+            if self.undistorter is not None and not undistorted:
+                frame = self.undistorter.undistort_frame(frame)
+
+            """
+            # Bout de code optionnel : recadrer le résultat pour supprimer les pixels noirs
+            # Entre commentaires pour l'activer si nécessaire.
+
+            x, y, w, h = self.undistorter.get_roi(frame.shape)
+            if all(val > 0 for val in [x, y, w, h]):  # Vérifier que ROI est valide
+                undistorted_frame = frame[y:y+h, x:x+w]
+                # Redimensionner si nécessaire pour maintenir la taille d'origine
+                undistorted_frame = cv2.resize(undistorted_frame, (frame.shape[1], frame.shape[0]))
+
+            # Utiliser l'image corrigée pour la suite du traitement
+            frame = undistorted_frame
+            """
+
+            # Région d'intérêt autour de la personne (image complète si elle n'est pas suivie)
+            if self.roi_tracker is not None:
+                region = self.roi_tracker.crop(frame)
+                model = self._model_for(self.roi_tracker.roi)
+            else:
+                region = frame
+                model = self.pose
+
+            # Conversion de l'image pour MediaPipe
+            image = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = model.process(image)
+
+            image_landmarks = None
+            landmark_array = None
+            if results.pose_landmarks:
+                # Tous les landmarks dans un seul tableau (33, 4)
+                image_landmarks = pf.landmarks_to_array(results.pose_landmarks)
+                if self.roi_tracker is not None:
+                    image_landmarks = self.roi_tracker.to_full_frame(image_landmarks, frame.shape)
+                landmark_array = image_landmarks
+
+                # Correction de la distorsion des seuls landmarks sélectionnés (mode "points")
+                if self.undistorter is not None:
+                    landmark_array = self.undistorter.undistort_landmark_array(
+                        landmark_array, frame.shape, pf.SELECTED_INDICES)
+
+            # Région de la frame suivante
+            if self.roi_tracker is not None:
+                self.roi_tracker.update(image_landmarks, frame.shape, pf.SELECTED_INDICES)
+
+            self.frame = frame
+            self.results = results
+            self.image_landmarks = image_landmarks
+            self.landmark_array = landmark_array
+            return landmark_array
+
+    def process(self, frame, undistorted=False):
+        """
+        Détecte la pose et calcule les coordonnées 3D des articulations sélectionnées.
+
+        Args:
+            frame: Image BGR
+            undistorted: L'image est déjà corrigée (undistorter.undistort_frame)
+        Returns:
+            Tableau (17, 4) des coordonnées 3D (x, y, z, visibilité), ou None si aucune personne détectée
+        """
+        if self.undistorter is None:
+            raise ValueError("Une calibration est nécessaire pour calculer les coordonnées 3D")
+
+        landmark_array = self.detect(frame, undistorted)
+        if landmark_array is None:
+            return None
+
+        return self.body_array(landmark_array, frame.shape)
+
+    def body_array(self, landmark_array, image_shape):
+        """
+        Calcule les coordonnées 3D des articulations sélectionnées à partir de landmarks déjà corrigés.
+
+        Args:
+            landmark_array: Tableau (33, 4) des landmarks normalisés
+            image_shape: Les dimensions de l'image (height, width, ...)
+        Returns:
+            Tableau (17, 4) des coordonnées 3D (x, y, z, visibilité)
+        """
+        return pf.extract_body_array_3d(
+            landmark_array,
+            image_shape,
+            self.undistorter.get_camera_matrix(image_shape)
+        )
+
+    def keypoints(self, image_shape, landmark_array=None):
+        """
+        Coordonnées en pixels des articulations sélectionnées.
+
+        Args:
+            image_shape: Les dimensions de l'image (height, width, ...)
+            landmark_array: Tableau (33, 4) des landmarks (défaut : ceux de la dernière frame)
+        Returns:
+            Tableau (17, 3) float32 : x, y en pixels et visibilité. [-1, -1, 0] si aucune personne détectée.
+        """
+        if landmark_array is None:
+            landmark_array = self.landmark_array
+        if landmark_array is None:
+            keypoints = np.full((len(pf.SELECTED_INDICES), 3), -1, dtype=np.float32)
+            keypoints[:, 2] = 0
+            return keypoints
+
+        h, w = image_shape[:2]
+        keypoints = landmark_array[pf.SELECTED_INDICES][:, [0, 1, 3]]
+        keypoints[:, 0] *= w
+        keypoints[:, 1] *= h
+        return keypoints
+
+    def close(self):
+        """Libère les modèles MediaPipe."""
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
+        if self._detector is not None:
+            self._detector.close()
+            self._detector = None
+        self._pose_framing = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
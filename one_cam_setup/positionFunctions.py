@@ -1,4 +1,5 @@
 import cv2
+import numpy as np
 
 # Fonction pour dessiner seulement certains os
 def draw_selected_landmarks(image, landmarks, connections, selected_indices):
@@ -34,6 +35,144 @@ def draw_selected_landmarks(image, landmarks, connections, selected_indices):
             cv2.line(image, start_point, end_point, (0, 255, 0), 2)
 
 
+def draw_selected_landmark_array(image, landmark_array, connections, selected_indices):
+    """
+    Comme draw_selected_landmarks, à partir d'un tableau de landmarks (voir landmarks_to_array).
+
+    Args:
+        image: L'image sur laquelle dessiner les landmarks.
+        landmark_array: Tableau (33, 4) des landmarks normalisés.
+        connections: Les connexions entre les landmarks.
+        selected_indices: Liste des indices des landmarks à dessiner.
+    Returns:
+        None
+    """
+    h, w = image.shape[:2]
+    points = (landmark_array[:, :2] * (w, h)).astype(int)
+    selected = set(int(idx) for idx in selected_indices)
+
+    # Dessin des os sélectionnés uniquement
+    for idx in selected:
+        cv2.circle(image, tuple(points[idx]), 10, (255, 0, 255), cv2.FILLED)
+
+    # Dessin des connections entre les os sélectionnés
+    for start_idx, end_idx in connections:
+        if start_idx in selected and end_idx in selected:
+            cv2.line(image, tuple(points[start_idx]), tuple(points[end_idx]), (0, 255, 0), 2)
+
+
+# Cartographie des indices aux noms de parties du corps
+LANDMARK_NAMES = {
+    0: "nose", 
+    2: "left_eye", 
+    5: "right_eye",
+    11: "left_shoulder", 
+    12: "right_shoulder",
+    13: "left_elbow", 
+    14: "right_elbow",
+    15: "left_wrist", 
+    16: "right_wrist",
+    23: "left_hip", 
+    24: "right_hip",
+    25: "left_knee", 
+    26: "right_knee",
+    27: "left_ankle", 
+    28: "right_ankle",
+    29: "left_foot", 
+    30: "right_foot"
+}
+
+# Indices MediaPipe et noms des articulations, dans l'ordre des lignes des tableaux de coordonnées
+SELECTED_INDICES = np.array(list(LANDMARK_NAMES.keys()), dtype=np.intp)
+JOINT_NAMES = list(LANDMARK_NAMES.values())
+
+# Mapping des points MediaPipe vers les os Blender
+BONE_MAPPING = {
+    "left_shoulder": "shoulder.L",
+    "right_shoulder": "shoulder.R",
+    "left_elbow": "upper_arm.L",
+    "right_elbow": "upper_arm.R",
+    "left_wrist": "forearm.L",
+    "right_wrist": "forearm.R",
+    "left_hip": "thigh.L",
+    "right_hip": "thigh.R",
+    "left_knee": "shin.L",
+    "right_knee": "shin.R",
+    "left_ankle": "foot.L",
+    "right_ankle": "foot.R"
+}
+
+# Noms des os Blender et lignes correspondantes dans le tableau des articulations
+BLENDER_BONE_NAMES = list(BONE_MAPPING.values())
+BLENDER_BONE_ROWS = np.array([JOINT_NAMES.index(point) for point in BONE_MAPPING], dtype=np.intp)
+
+
+def landmarks_to_array(landmarks):
+    """
+    Copie les landmarks MediaPipe dans un tableau, en une seule passe.
+
+    Args:
+        landmarks: Les landmarks MediaPipe
+    
+    Returns:
+        Un tableau (33, 4) float32 : x, y, z normalisés et visibilité
+    """
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark], dtype=np.float32)
+
+
+def extract_body_array_3d(landmark_array, image_shape, camera_matrix, reference_depth=1.0):
+    """
+    Version vectorisée de extract_body_coordinates_3d : la rétro-projection de toutes les articulations
+    sélectionnées est calculée en une seule expression NumPy.
+    
+    Args:
+        landmark_array: Tableau (33, 4) des landmarks (voir landmarks_to_array)
+        image_shape: Les dimensions de l'image (height, width, channels)
+        camera_matrix: Matrice intrinsèque de la caméra
+        reference_depth: Profondeur de référence en mètres
+    
+    Returns:
+        Un tableau (17, 4) float32 : x, y, z en mètres et visibilité, dans l'ordre de JOINT_NAMES
+    """
+    h, w = image_shape[:2]
+    fx, fy = camera_matrix[0, 0], camera_matrix[1, 1]
+    cx, cy = camera_matrix[0, 2], camera_matrix[1, 2]
+
+    selected = landmark_array[SELECTED_INDICES]
+    body_array = np.empty((len(SELECTED_INDICES), 4), dtype=np.float32)
+
+    # Coordonnées en pixels (tronquées comme dans la version par dictionnaire)
+    x_px = np.trunc(selected[:, 0] * w)
+    y_px = np.trunc(selected[:, 1] * h)
+
+    # MediaPipe donne z en unités relatives à la largeur des hanches
+    depth_real = reference_depth + selected[:, 2] * 0.5  # Ajustement empirique
+
+    # Coordonnées 3D en mètres
+    body_array[:, 0] = (x_px - cx) * depth_real / fx
+    body_array[:, 1] = (y_px - cy) * depth_real / fy
+    body_array[:, 2] = depth_real
+    body_array[:, 3] = selected[:, 3]
+
+    return body_array
+
+
+def body_array_to_dict(body_array):
+    """
+    Convertit un tableau de coordonnées 3D vers le format dictionnaire de extract_body_coordinates_3d.
+
+    Args:
+        body_array: Tableau (17, 4) retourné par extract_body_array_3d
+    
+    Returns:
+        Un dictionnaire contenant les coordonnées 3D en mètres
+    """
+    return {
+        name: {"x": float(x), "y": float(y), "z": float(z), "visibility": float(visibility)}
+        for name, (x, y, z, visibility) in zip(JOINT_NAMES, body_array)
+    }
+
+
 def extract_body_coordinates_3d(landmarks, image_shape, camera_matrix, reference_depth=1.0):
     """
     Extrait les coordonnées 3D des points clés du corps dans l'espace réel
@@ -41,71 +180,50 @@ def extract_body_coordinates_3d(landmarks, image_shape, camera_matrix, reference
     Args:
         landmarks: Les landmarks MediaPipe
         image_shape: Les dimensions de l'image (height, width, channels)
-        camera_matrix: Matrice intrinsèque de la caméra        reference_depth: Profondeur de référence en mètres
+        camera_matrix: Matrice intrinsèque de la caméra
+        reference_depth: Profondeur de référence en mètres
     
     Returns:
         Un dictionnaire contenant les coordonnées 3D en mètres
     """
-    h, w, _ = image_shape
-    body_points_3d = {}
-    
-    # Cartographie des indices aux noms de parties du corps
-    landmark_names = {
-        0: "nose", 
-        2: "left_eye", 
-        5: "right_eye",
-        11: "left_shoulder", 
-        12: "right_shoulder",
-        13: "left_elbow", 
-        14: "right_elbow",
-        15: "left_wrist", 
-        16: "right_wrist",
-        23: "left_hip", 
-        24: "right_hip",
-        25: "left_knee", 
-        26: "right_knee",
-        27: "left_ankle", 
-        28: "right_ankle",
-        29: "left_foot", 
-        30: "right_foot"
-    }
+    body_array = extract_body_array_3d(landmarks_to_array(landmarks), image_shape, camera_matrix, reference_depth)
+    return body_array_to_dict(body_array)
+
+
+def visibility_percentage(body_array, threshold=0.5):
+    """
+    Pourcentage d'articulations visibles.
+
+    Args:
+        body_array: Tableau (17, 4) retourné par extract_body_array_3d
+        threshold: MediaPipe considère un point comme "visible" si sa visibilité est > 0.5
     
-    for idx, name in landmark_names.items():
-        landmark = landmarks.landmark[idx]
-        
-        # Coordonnées en pixels
-        x_px, y_px = int(landmark.x * w), int(landmark.y * h)
-        
-        # Utiliser la coordonnée z de MediaPipe comme profondeur relative
-        # MediaPipe donne z en unités relatives à la largeur des hanches
-        depth_relative = landmark.z
-        depth_real = reference_depth + (depth_relative * 0.5)  # Ajustement empirique
-        
-        # Conversion des coordonnées pixel vers coordonnées 3D réelles
-        # Utilisation de la matrice inverse de la caméra
-        fx, fy = camera_matrix[0, 0], camera_matrix[1, 1]
-        cx, cy = camera_matrix[0, 2], camera_matrix[1, 2]
-        
-        # Coordonnées 3D en mètres
-        x = (x_px - cx) * depth_real / fx
-        y = (y_px - cy) * depth_real / fy
-        z = depth_real
-        
-        body_points_3d[name] = {
-            "x": x,
-            "y": y, 
-            "z": z,
-            "visibility": landmark.visibility
-        }
+    Returns:
+        Le pourcentage de points visibles
+    """
+    return float(np.count_nonzero(body_array[:, 3] > threshold)) * 100 / len(body_array)
+
+
+def blender_bone_array(body_array):
+    """
+    Sélectionne les os Blender et convertit les coordonnées (Y-up vers Z-up).
+
+    Args:
+        body_array: Tableau (17, 4) retourné par extract_body_array_3d
     
-    return body_points_3d
+    Returns:
+        Un tableau (12, 4) float32 : location x, y, z et visibilité, dans l'ordre de BLENDER_BONE_NAMES
+    """
+    bones = body_array[BLENDER_BONE_ROWS]
+    return np.stack((bones[:, 0], bones[:, 2], -bones[:, 1], bones[:, 3]), axis=1)
+
 
 def export_to_blender_format(body_coordinates_3d, frame_number):
     """
     Exporte les coordonnées en 3 dimensions au format utilisable via Blender
     
     Args:
-        body_coordinates_3d: Dictionnaire des coordonnées 3D
+        body_coordinates_3d: Tableau (17, 4) des coordonnées 3D ou dictionnaire des coordonnées 3D
         frame_number: Numéro de la frame actuelle
     
     Returns:
@@ -115,24 +233,16 @@ def export_to_blender_format(body_coordinates_3d, frame_number):
         "frame": frame_number,
         "bones": {}
     }
+
+    if isinstance(body_coordinates_3d, np.ndarray):
+        for blender_bone, (x, y, z, visibility) in zip(BLENDER_BONE_NAMES, blender_bone_array(body_coordinates_3d)):
+            blender_data["bones"][blender_bone] = {
+                "location": [float(x), float(y), float(z)],
+                "visibility": float(visibility)
+            }
+        return blender_data
     
-    # Mapping des points MediaPipe vers les os Blender
-    bone_mapping = {
-        "left_shoulder": "shoulder.L",
-        "right_shoulder": "shoulder.R",
-        "left_elbow": "upper_arm.L",
-        "right_elbow": "upper_arm.R",
-        "left_wrist": "forearm.L",
-        "right_wrist": "forearm.R",
-        "left_hip": "thigh.L",
-        "right_hip": "thigh.R",
-        "left_knee": "shin.L",
-        "right_knee": "shin.R",
-        "left_ankle": "foot.L",
-        "right_ankle": "foot.R"
-    }
-    
-    for mediapipe_point, blender_bone in bone_mapping.items():
+    for mediapipe_point, blender_bone in BONE_MAPPING.items():
         if mediapipe_point in body_coordinates_3d:
             coords = body_coordinates_3d[mediapipe_point]
             blender_data["bones"][blender_bone] = {
@@ -141,4 +251,3 @@ def export_to_blender_format(body_coordinates_3d, frame_number):
             }
     
     return blender_data
-
@@ -0,0 +1,399 @@
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import numpy as np
+
+"""
+Format binaire des enregistrements d'animation (.skrec).
+
+Le fichier commence par un en-tête :
+    - 6 octets : signature b"SKREC\\0"
+    - uint16 : version du format
+    - uint32 : taille de l'en-tête JSON
+    - en-tête JSON (UTF-8) : noms des articulations, champs par articulation, heure de début, ...
+    - remplissage jusqu'à un multiple de 64 octets
+
+Puis les frames, ajoutées les unes après les autres, toutes de même taille :
+    - float64 : timestamp en secondes depuis le début de l'enregistrement
+    - int64 : numéro de frame
+    - uint32 : indicateurs de la frame (FLAG_PROPAGATED, ...), à partir de la version 2
+    - uint32 : réservé (zéro), à partir de la version 3 : la taille d'une frame est un multiple de
+      8 octets, les float64 de toutes les frames restent alignés dans la projection en mémoire
+    - float32 x (nombre d'articulations, 4) : x, y, z et visibilité
+
+Le nombre de frames n'est pas écrit dans l'en-tête : il se déduit de la taille du fichier. Un fichier
+interrompu (plantage en cours d'enregistrement) reste donc lisible jusqu'à la dernière frame complète.
+"""
+
+MAGIC = b"SKREC\0"
+VERSION = 3
+FIELDS = ["x", "y", "z", "visibility"]
+
+# Indicateurs d'une frame
+FLAG_PROPAGATED = 1  # Articulations propagées par flux optique depuis la dernière inférence (voir keypointFlow)
+_PREFIX = struct.Struct("<6sHI")
+_ALIGNMENT = 64
+
+
+def frame_dtype(joint_count, version=VERSION):
+    """
+    Args:
+        joint_count: Nombre d'articulations par frame
+        version: Version du format
+    Returns:
+        Le type NumPy structuré d'une frame
+    """
+    fields = [("timestamp", "<f8"), ("frame", "<i8")]
+    if version >= 2:
+        fields.append(("flags", "<u4"))
+    if version >= 3:
+        fields.append(("reserved", "<u4"))
+    fields.append(("joints", "<f4", (joint_count, len(FIELDS))))
+    return np.dtype(fields)
+
+
+def _encode_header(header):
+    payload = json.dumps(header).encode("utf-8")
+    size = _PREFIX.size + len(payload)
+    padding = (-size) % _ALIGNMENT
+    return _PREFIX.pack(MAGIC, VERSION, len(payload)) + payload + b" " * padding
+
+
+def read_header(f):
+    """
+    Lit l'en-tête d'un enregistrement.
+
+    Args:
+        f: Fichier ouvert en lecture binaire, positionné au début
+    Returns:
+        (en-tête, position du début des frames)
+    """
+    magic, version, payload_size = _PREFIX.unpack(f.read(_PREFIX.size))
+    if magic != MAGIC:
+        raise ValueError("Ce fichier n'est pas un enregistrement d'animation (.skrec)")
+    if version > VERSION:
+        raise ValueError(f"Version du format non supportée: {version}")
+
+    header = json.loads(f.read(payload_size).decode("utf-8"))
+    header["version"] = version
+
+    size = _PREFIX.size + payload_size
+    return header, size + (-size) % _ALIGNMENT
+
+
+class RecordingWriter:
+    """
+    Écriture d'un enregistrement en continu, depuis un thread d'arrière-plan.
+
+    Les frames sont placées dans une file bornée puis écrites par lots à la fin du fichier.
+    Chaque lot est transmis au système dès qu'il est écrit : en cas de plantage, tout ce qui a déjà
+    été écrit est conservé. L'arrêt de l'enregistrement (close) ne fait qu'envoyer un signal de fin
+    au thread d'écriture et ne bloque pas la boucle de capture. Une erreur d'écriture (disque plein,
+    ...) arrête le thread et est levée par l'appel suivant de write, write_block ou close.
+    """
+
+    def __init__(self, filename, joint_names, batch_size=32, max_pending=1024, metadata=None):
+        """
+        Args:
+            filename: Chemin du fichier à créer
+            joint_names: Noms des articulations, dans l'ordre des lignes des tableaux écrits
+            batch_size: Nombre maximum de frames écrites en une fois
+            max_pending: Nombre maximum de frames en attente d'écriture
+            metadata: Informations supplémentaires ajoutées à l'en-tête
+        """
+        self.filename = filename
+        self.joint_names = list(joint_names)
+        self.dtype = frame_dtype(len(self.joint_names))
+        self.batch_size = batch_size
+        self.frame_count = 0
+
+        header = {
+            "joint_names": self.joint_names,
+            "fields": FIELDS,
+            "start_time": time.time(),
+        }
+        if metadata:
+            header.update(metadata)
+
+        self._file = open(filename, "wb")
+        self._file.write(_encode_header(header))
+        self._file.flush()
+
+        self._queue = queue.Queue(max_pending)
+        self._closed = False
+        self._error = None  # Erreur du thread d'écriture, levée par le prochain appel
+        # Thread non démon : les frames en attente sont écrites même si le programme se termine
+        self._thread = threading.Thread(target=self._writer_loop, name="recording-writer")
+        self._thread.start()
+
+    def write(self, joints, frame_number, timestamp, flags=0):
+        """
+        Ajoute une frame à l'enregistrement.
+
+        Args:
+            joints: Tableau (nombre d'articulations, 4) : x, y, z et visibilité
+            frame_number: Numéro de la frame
+            timestamp: Temps en secondes depuis le début de l'enregistrement
+            flags: Indicateurs de la frame (FLAG_PROPAGATED, ...)
+        Returns:
+            None
+        """
+        record = np.zeros(1, dtype=self.dtype)
+        record["timestamp"] = timestamp
+        record["frame"] = frame_number
+        record["flags"] = flags
+        record["joints"] = joints
+        self._put(record)
+        self.frame_count += 1
+
+    def write_block(self, joints, frame_numbers, timestamps, flags=0):
+        """
+        Ajoute plusieurs frames d'un coup.
+
+        Args:
+            joints: Tableau (n, nombre d'articulations, 4)
+            frame_numbers: Tableau (n,) des numéros de frame
+            timestamps: Tableau (n,) des temps en secondes
+            flags: Indicateurs des frames (valeur unique ou tableau (n,))
+        Returns:
+            None
+        """
+        block = np.zeros(len(frame_numbers), dtype=self.dtype)
+        block["timestamp"] = timestamps
+        block["frame"] = frame_numbers
+        block["flags"] = flags
+        block["joints"] = joints
+        self._put(block)
+        self.frame_count += len(block)
+
+    def close(self, wait=False):
+        """
+        Termine l'enregistrement. Les frames en attente sont écrites par le thread d'arrière-plan.
+
+        Args:
+            wait: Attendre que toutes les frames soient écrites sur le disque
+        Returns:
+            None
+        """
+        if not self._closed:
+            self._closed = True
+            self._put(None)
+        if wait:
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _put(self, item):
+        # Attente bornée : si le thread d'écriture s'est arrêté, la file ne se videra plus
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    raise IOError(f"{self.filename}: le thread d'écriture est arrêté")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(wait=True)
+
+    def _writer_loop(self):
+        done = False
+        while not done:
+            batch = [self._queue.get()]
+            # Regrouper les frames déjà en attente pour limiter le nombre d'écritures
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+
+            if batch:
+                try:
+                    self._file.write(np.concatenate(batch).tobytes())
+                    self._file.flush()
+                except (OSError, ValueError) as e:
+                    # Disque plein, fichier fermé, ... : conservé pour l'appelant
+                    self._error = e
+                    break
+
+        try:
+            self._file.close()
+        except OSError as e:
+            self._error = self._error or e
+
+
+class RecordingReader:
+    """
+    Lecture d'un enregistrement sans le charger en mémoire.
+
+    Le fichier est projeté en mémoire (np.memmap) : les frames ne sont lues sur le disque qu'au moment
+    où elles sont utilisées. Comme toutes les frames ont la même taille, l'accès à une frame par son
+    indice est immédiat, quelle que soit la durée de l'enregistrement.
+
+    Seuls les temps des frames sont copiés à l'ouverture, dans un tableau contigu (8 octets par frame) :
+    np.searchsorted copierait sinon toute la colonne à chaque recherche, la vue sur la projection
+    n'étant pas contiguë.
+    """
+
+    def __init__(self, filename):
+        """
+        Args:
+            filename: Chemin de l'enregistrement
+        """
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self.header, offset = read_header(f)
+        self.joint_names = self.header["joint_names"]
+        self.dtype = frame_dtype(len(self.joint_names), self.header["version"])
+
+        # Une frame incomplète (enregistrement interrompu) est ignorée
+        frame_total = max(0, os.path.getsize(filename) - offset) // self.dtype.itemsize
+        if frame_total:
+            self.frames = np.memmap(filename, dtype=self.dtype, mode="r", offset=offset, shape=(frame_total,))
+        else:
+            self.frames = np.empty(0, dtype=self.dtype)
+        # Tableau (n,) contigu des temps en secondes des frames (index_at, time_range)
+        self.timestamps = np.ascontiguousarray(self.frames["timestamp"], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        """Une frame (indice) ou une vue sur plusieurs frames (tranche), sans copie"""
+        return self.frames[index]
+
+    @property
+    def has_flags(self):
+        """Les fichiers de version 1 n'ont pas de champ flags"""
+        return "flags" in self.dtype.names
+
+    @property
+    def joints(self):
+        """Vue (n, nombre d'articulations, 4) sur les articulations des frames"""
+        return self.frames["joints"]
+
+    def index_at(self, timestamp):
+        """
+        Args:
+            timestamp: Temps en secondes depuis le début de l'enregistrement
+        Returns:
+            Indice de la dernière frame dont le temps est inférieur ou égal à timestamp (0 avant la première)
+        """
+        # Recherche dichotomique dans la copie contiguë des temps, sans lire le fichier
+        index = int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1
+        return min(max(index, 0), max(len(self) - 1, 0))
+
+    def time_range(self, start=None, end=None):
+        """
+        Args:
+            start: Temps de début en secondes (inclus), None : début de l'enregistrement
+            end: Temps de fin en secondes (exclu), None : fin de l'enregistrement
+        Returns:
+            Vue sur les frames dont le temps est dans [start, end)
+        """
+        first = 0 if start is None else int(np.searchsorted(self.timestamps, start, side="left"))
+        last = len(self) if end is None else int(np.searchsorted(self.timestamps, end, side="left"))
+        return self.frames[first:max(first, last)]
+
+    def blocks(self, block_size=4096):
+        """
+        Parcourt l'enregistrement par blocs, pour les traitements qui lisent toutes les frames.
+
+        Args:
+            block_size: Nombre de frames par bloc
+        Returns:
+            Itérateur de vues sur les frames
+        """
+        for start in range(0, len(self), block_size):
+            yield self.frames[start:start + block_size]
+
+    def close(self):
+        """Libère la projection du fichier (les vues déjà obtenues la gardent ouverte)"""
+        self.frames = np.empty(0, dtype=self.dtype)
+        self.timestamps = np.empty(0, dtype=np.float64)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_recording(filename):
+    """
+    Ouvre un enregistrement complet, projeté en mémoire (voir RecordingReader).
+
+    Args:
+        filename: Chemin de l'enregistrement
+    Returns:
+        (en-tête, tableau structuré des frames). Le champ "flags" n'existe pas dans les fichiers de version 1.
+    """
+    reader = RecordingReader(filename)
+    return reader.header, reader.frames
+
+
+def to_blender_frames(header, frames):
+    """
+    Convertit les frames d'un enregistrement vers le format JSON Blender (voir positionFunctions).
+
+    Args:
+        header: En-tête de l'enregistrement
+        frames: Tableau structuré des frames
+    Returns:
+        Liste de dictionnaires formatés pour Blender
+    """
+    joint_names = header["joint_names"]
+    has_flags = "flags" in frames.dtype.names
+    blender_frames = []
+    for record in frames:
+        bones = {}
+        for name, (x, y, z, visibility) in zip(joint_names, record["joints"].tolist()):
+            bones[name] = {"location": [x, y, z], "visibility": visibility}
+        blender_frame = {"frame": int(record["frame"]), "bones": bones}
+        if has_flags:
+            blender_frame["propagated"] = bool(record["flags"] & FLAG_PROPAGATED)
+        blender_frames.append(blender_frame)
+    return blender_frames
+
+
+def export_json(filename, json_filename):
+    """
+    Exporte un enregistrement binaire au format JSON utilisé par Blender.
+
+    Args:
+        filename: Chemin de l'enregistrement (.skrec)
+        json_filename: Chemin du fichier JSON à créer
+    Returns:
+        None
+    """
+    # Conversion par blocs : l'enregistrement n'est jamais chargé en entier
+    with RecordingReader(filename) as reader, open(json_filename, "w") as f:
+        f.write("[")
+        separator = ""
+        for block in reader.blocks():
+            for blender_frame in to_blender_frames(reader.header, block):
+                f.write(separator + json.dumps(blender_frame))
+                separator = ", "
+        f.write("]")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 3:
+        export_json(sys.argv[1], sys.argv[2])
+        print(f"'{sys.argv[1]}' exporté dans '{sys.argv[2]}'")
+    else:
+        print("Utilisation: python3 recording.py <enregistrement.skrec> <sortie.json>")
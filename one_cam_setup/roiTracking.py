@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+
+class RoiTracker:
+    """
+    Suivi d'une région d'intérêt autour de la personne pour réduire l'image donnée à MediaPipe.
+
+    La région est un cadre (avec marge) autour des landmarks de la frame précédente. Seule cette région
+    est recadrée et redimensionnée pour l'inférence, puis les landmarks sont ramenés dans le repère de
+    l'image complète. La région n'est recalculée que lorsque la personne s'approche de ses bords : elle
+    reste stable d'une frame à l'autre, ce qui préserve le suivi interne de MediaPipe. Si la confiance
+    chute (personne perdue ou peu visible), l'inférence repasse sur l'image complète.
+
+    À chaque changement de cadrage (image complète ou région), le suivi de MediaPipe, fait dans les
+    coordonnées de l'ancien cadrage, n'est plus valable : PoseTracker le réinitialise, et la frame qui
+    suit un changement coûte une détection complète. Une personne perdue est recherchée par un modèle
+    en mode image statique sur l'image complète.
+    """
+
+    def __init__(self, padding=0.25, edge_margin=0.08, min_visibility=0.5, max_side=512, min_size=0.2):
+        """
+        Args:
+            padding: Marge ajoutée autour des landmarks (fraction de la taille du cadre)
+            edge_margin: Distance minimale aux bords de la région avant de la recalculer (fraction de sa taille)
+            min_visibility: Visibilité moyenne minimale des landmarks pour rester en mode région
+            max_side: Plus grande dimension de la région donnée à MediaPipe
+            min_size: Taille minimale de la région (fraction de l'image)
+        """
+        self.padding = padding
+        self.edge_margin = edge_margin
+        self.min_visibility = min_visibility
+        self.max_side = max_side
+        self.min_size = min_size
+        self.roi = None  # (x0, y0, x1, y1) en pixels, ou None : image complète
+
+    def reset(self):
+        """Repasse sur l'image complète à la prochaine frame."""
+        self.roi = None
+
+    def crop(self, frame):
+        """
+        Recadre et redimensionne l'image pour l'inférence.
+
+        Args:
+            frame: Image complète
+        Returns:
+            L'image à donner à MediaPipe (l'image complète si aucune région n'est suivie)
+        """
+        if self.roi is None:
+            return frame
+        x0, y0, x1, y1 = self.roi
+        region = frame[y0:y1, x0:x1]
+        scale = self.max_side / max(x1 - x0, y1 - y0)
+        if scale < 1.0:
+            region = cv2.resize(region, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return region
+
+    def to_full_frame(self, landmark_array, frame_shape):
+        """
+        Ramène les landmarks détectés dans la région vers le repère de l'image complète.
+
+        Args:
+            landmark_array: Tableau (33, 4) des landmarks normalisés dans la région
+            frame_shape: Les dimensions de l'image complète (height, width, ...)
+        Returns:
+            Tableau (33, 4) des landmarks normalisés dans l'image complète
+        """
+        if self.roi is None:
+            return landmark_array
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = self.roi
+        full = landmark_array.copy()
+        full[:, 0] = (landmark_array[:, 0] * (x1 - x0) + x0) / w
+        full[:, 1] = (landmark_array[:, 1] * (y1 - y0) + y0) / h
+        # MediaPipe donne z à l'échelle de la largeur de l'image
+        full[:, 2] = landmark_array[:, 2] * (x1 - x0) / w
+        return full
+
+    def update(self, landmark_array, frame_shape, selected_indices):
+        """
+        Met à jour la région à partir des landmarks de la frame courante.
+
+        Args:
+            landmark_array: Tableau (33, 4) des landmarks dans l'image complète, ou None si personne n'est détecté
+            frame_shape: Les dimensions de l'image complète (height, width, ...)
+            selected_indices: Indices des landmarks utilisés pour le cadre
+        Returns:
+            None
+        """
+        if landmark_array is None:
+            self.roi = None
+            return
+
+        selected = landmark_array[selected_indices]
+        if selected[:, 3].mean() < self.min_visibility:
+            # Confiance insuffisante : retour à l'image complète
+            self.roi = None
+            return
+
+        h, w = frame_shape[:2]
+        xs = selected[:, 0] * w
+        ys = selected[:, 1] * h
+        bx0, bx1, by0, by1 = xs.min(), xs.max(), ys.min(), ys.max()
+
+        # La région actuelle contient encore la personne avec une marge suffisante : on la garde
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            mx = self.edge_margin * (x1 - x0)
+            my = self.edge_margin * (y1 - y0)
+            if bx0 >= x0 + mx and bx1 <= x1 - mx and by0 >= y0 + my and by1 <= y1 - my:
+                return
+
+        # Nouveau cadre carré centré sur la personne, avec marge
+        side = max(bx1 - bx0, by1 - by0) * (1 + 2 * self.padding)
+        side = max(side, self.min_size * max(w, h))
+        cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+
+        x0 = int(max(0, cx - side / 2))
+        y0 = int(max(0, cy - side / 2))
+        x1 = int(min(w, cx + side / 2))
+        y1 = int(min(h, cy + side / 2))
+
+        # Cadre surtout hors de l'image (région vide ou trop petite après découpage) : image complète
+        min_side = 0.5 * self.min_size * max(w, h)
+        if x1 - x0 < min_side or y1 - y0 < min_side:
+            self.roi = None
+        # Région presque aussi grande que l'image : inutile de recadrer
+        elif (x1 - x0) * (y1 - y0) >= 0.8 * w * h:
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
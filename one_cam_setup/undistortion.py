@@ -0,0 +1,143 @@
+import cv2
+import numpy as np
+
+# Cache des tables de correction partagé entre les instances.
+# Clé : (calibration, alpha, résolution) -> (map1, map2, nouvelle matrice caméra, roi)
+_maps_cache = {}
+
+
+class Undistorter:
+    """
+    Correction de la distorsion de la caméra.
+
+    Deux modes sont disponibles :
+        - "remap" : les tables de correction (initUndistortRectifyMap) sont calculées une seule fois
+          par couple (calibration, résolution), mises en cache, puis appliquées avec cv2.remap.
+        - "points" : l'image n'est pas corrigée. Seuls les landmarks sélectionnés sont corrigés avec
+          cv2.undistortPoints, avant l'extraction des coordonnées 3D (quelques microsecondes au lieu
+          de quelques millisecondes par frame).
+    """
+
+    MODES = ("remap", "points")
+
+    def __init__(self, camera_matrix, dist_coeffs, mode="remap", alpha=1):
+        """
+        Args:
+            camera_matrix: Matrice intrinsèque de la caméra
+            dist_coeffs: Coefficients de distorsion
+            mode: "remap" (correction de l'image) ou "points" (correction des landmarks uniquement)
+            alpha: Paramètre de cv2.getOptimalNewCameraMatrix (0 = recadré, 1 = tous les pixels conservés)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Mode de correction inconnu: {mode} (attendu: {', '.join(self.MODES)})")
+
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).ravel()
+        self.mode = mode
+        self.alpha = alpha
+
+        # Identifiant de la calibration utilisé comme clé de cache
+        self._calibration_key = (self.camera_matrix.tobytes(), self.dist_coeffs.tobytes(), alpha)
+
+    def _get_maps(self, w, h):
+        """
+        Retourne les tables de correction pour la résolution donnée, en les calculant au premier appel.
+
+        Args:
+            w: Largeur de l'image
+            h: Hauteur de l'image
+
+        Returns:
+            (map1, map2, nouvelle matrice caméra, roi)
+        """
+        key = self._calibration_key + ((w, h),)
+        maps = _maps_cache.get(key)
+        if maps is None:
+            new_camera_matrix, roi = cv2.getOptimalNewCameraMatrix(
+                self.camera_matrix, self.dist_coeffs, (w, h), self.alpha, (w, h))
+            # CV_16SC2 : format le plus rapide pour cv2.remap (virgule fixe)
+            map1, map2 = cv2.initUndistortRectifyMap(
+                self.camera_matrix, self.dist_coeffs, None, new_camera_matrix, (w, h), cv2.CV_16SC2)
+            maps = (map1, map2, new_camera_matrix, roi)
+            _maps_cache[key] = maps
+        return maps
+
+    def undistort_frame(self, frame):
+        """
+        Corrige la distorsion de l'image (mode "remap"). En mode "points", l'image est retournée telle quelle.
+
+        Args:
+            frame: Image BGR de la caméra
+
+        Returns:
+            L'image corrigée
+        """
+        if self.mode != "remap":
+            return frame
+        h, w = frame.shape[:2]
+        map1, map2, _, _ = self._get_maps(w, h)
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+
+    def get_camera_matrix(self, image_shape):
+        """
+        Matrice caméra à utiliser pour la rétro-projection des points de l'image traitée.
+
+        Args:
+            image_shape: Les dimensions de l'image (height, width, ...)
+
+        Returns:
+            La nouvelle matrice caméra en mode "remap", la matrice d'origine en mode "points"
+        """
+        if self.mode != "remap":
+            return self.camera_matrix
+        h, w = image_shape[:2]
+        return self._get_maps(w, h)[2]
+
+    def get_roi(self, image_shape):
+        """
+        Région valide (sans pixels noirs) de l'image corrigée, en mode "remap".
+
+        Args:
+            image_shape: Les dimensions de l'image (height, width, ...)
+
+        Returns:
+            (x, y, w, h)
+        """
+        h, w = image_shape[:2]
+        return self._get_maps(w, h)[3]
+
+    def undistort_points(self, points):
+        """
+        Corrige la distorsion d'un ensemble de points en pixels.
+
+        Args:
+            points: Tableau (N, 2) de coordonnées en pixels
+
+        Returns:
+            Tableau (N, 2) de coordonnées corrigées, en pixels, dans le repère de camera_matrix
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        undistorted = cv2.undistortPoints(points, self.camera_matrix, self.dist_coeffs, P=self.camera_matrix)
+        return undistorted.reshape(-1, 2)
+
+    def undistort_landmark_array(self, landmark_array, image_shape, selected_indices):
+        """
+        Corrige la distorsion des landmarks sélectionnés (mode "points").
+        En mode "remap", l'image est déjà corrigée et le tableau est retourné tel quel.
+
+        Args:
+            landmark_array: Tableau (33, 4) des landmarks (coordonnées normalisées, voir positionFunctions)
+            image_shape: Les dimensions de l'image (height, width, ...)
+            selected_indices: Indices des landmarks à corriger
+
+        Returns:
+            Une copie du tableau avec les landmarks sélectionnés corrigés
+        """
+        if self.mode != "points":
+            return landmark_array
+        h, w = image_shape[:2]
+        scale = np.array([w, h], dtype=np.float64)
+        undistorted = landmark_array.copy()
+        points = landmark_array[selected_indices, :2] * scale
+        undistorted[selected_indices, :2] = self.undistort_points(points) / scale
+        return undistorted
@@ -0,0 +1,82 @@
+import numpy as np
+
+"""
+Sélection des vues de calibration.
+
+Beaucoup d'images montrant l'échiquier presque à la même position rallongent la calibration sans
+l'améliorer (et dégradent son conditionnement). Chaque vue est décrite par la position normalisée de
+ses coins ; les vues sont choisies une à une (sélection gloutonne) en privilégiant celle qui est la
+plus éloignée des vues déjà retenues et qui couvre de nouvelles zones de l'image. Une vue trop
+proche d'une vue déjà retenue est considérée comme redondante et écartée.
+"""
+
+# Distance minimale par défaut entre deux vues (déplacement moyen des coins, fraction de l'image)
+DEFAULT_MIN_DISTANCE = 0.03
+
+
+def _normalize(view, image_size):
+    # Une vue : coins d'une caméra, ou tuple des coins de chaque caméra (stéréo)
+    cameras = view if isinstance(view, (tuple, list)) else (view,)
+    return np.stack([np.asarray(c, dtype=np.float64).reshape(-1, 2) / image_size for c in cameras])
+
+
+def _distances(points, candidate):
+    # Déplacement moyen des coins entre la vue candidate et toutes les vues, pour chaque caméra le
+    # minimum entre les deux ordres de détection possibles (échiquier vu tourné de 180 degrés)
+    direct = np.linalg.norm(points - candidate, axis=-1).mean(axis=-1)
+    reverse = np.linalg.norm(points - candidate[:, ::-1], axis=-1).mean(axis=-1)
+    return np.minimum(direct, reverse).mean(axis=-1)
+
+
+def _coverage(points, grid):
+    # Cellules d'une grille grid x grid contenant au moins un coin (toutes caméras confondues)
+    cells = np.clip((points * grid).astype(int), 0, grid - 1)
+    covered = np.zeros((len(points), grid * grid), dtype=bool)
+    flat = (cells[..., 1] * grid + cells[..., 0]).reshape(len(points), -1)
+    np.put_along_axis(covered, flat, True, axis=1)
+    return covered
+
+
+def select_views(views, image_size, min_distance=DEFAULT_MIN_DISTANCE, max_views=None, grid=8,
+                 coverage_weight=0.5):
+    """
+    Choisit les vues à utiliser pour la calibration.
+
+    Args:
+        views: Liste des vues : coins (N, 1, 2) d'une image, ou tuple des coins de chaque caméra (stéréo)
+        image_size: Taille des images (w, h)
+        min_distance: Distance minimale à une vue déjà retenue (déplacement moyen des coins, fraction de l'image)
+        max_views: Nombre maximum de vues retenues (None : pas de limite)
+        grid: Taille de la grille utilisée pour mesurer la couverture de l'image
+        coverage_weight: Poids de la couverture de nouvelles zones dans le score d'une vue
+    Returns:
+        Liste triée des indices des vues retenues
+    """
+    if len(views) == 0:
+        return []
+
+    points = np.stack([_normalize(view, image_size) for view in views])
+    covered = _coverage(points, grid)
+
+    # Première vue : celle qui couvre la plus grande partie de l'image
+    first = int(np.argmax(covered.sum(axis=1)))
+    kept = [first]
+    min_distances = _distances(points, points[first])
+    union = covered[first].copy()
+    limit = len(views) if max_views is None else max_views
+
+    while len(kept) < limit:
+        candidates = min_distances >= min_distance
+        if not np.any(candidates):
+            break
+
+        # Score : éloignement des vues retenues + nouvelles zones couvertes
+        gain = (covered & ~union).sum(axis=1) / (grid * grid)
+        score = np.where(candidates, min_distances + coverage_weight * gain, -np.inf)
+        best = int(np.argmax(score))
+
+        kept.append(best)
+        min_distances = np.minimum(min_distances, _distances(points, points[best]))
+        union |= covered[best]
+
+    return sorted(kept)
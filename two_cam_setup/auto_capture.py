@@ -0,0 +1,89 @@
+import cv2 as cv
+import numpy as np
+import time
+
+"""
+FR:
+Capture automatique des images de calibration. Une détection rapide de l'échiquier (CALIB_CB_FAST_CHECK
+sur une copie réduite de l'image) tourne sur chaque frame, et une image est enregistrée dès que
+l'échiquier est visible dans toutes les caméras et que sa position diffère assez des images déjà
+enregistrées.
+--------------------------------------------------------------------------------------------
+EN:
+Automatic capture of the calibration images. A fast chessboard check (CALIB_CB_FAST_CHECK on a
+downscaled copy of the image) runs on every frame, and an image is saved as soon as the board is
+visible in all the cameras and its pose differs enough from the images already saved.
+"""
+
+FAST_CHECK_FLAGS = cv.CALIB_CB_FAST_CHECK + cv.CALIB_CB_ADAPTIVE_THRESH + cv.CALIB_CB_NORMALIZE_IMAGE
+
+
+def fast_board_check(frame, board_size, max_side=320):
+    """
+    Parameters:
+        frame: BGR image.
+        board_size: Number of inner corners of the chessboard.
+        max_side: Largest side of the downscaled copy used for the check.
+    Returns:
+        Corners (N, 2) normalized by the image size, or None if the board is not visible.
+    """
+    h, w = frame.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    gray = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+    if scale < 1.0:
+        gray = cv.resize(gray, None, fx=scale, fy=scale, interpolation=cv.INTER_AREA)
+
+    found, corners = cv.findChessboardCorners(gray, board_size, FAST_CHECK_FLAGS)
+    if not found:
+        return None
+    return corners.reshape(-1, 2) / (gray.shape[1], gray.shape[0])
+
+
+class AutoCapture:
+    """
+    Decides when a set of frames (one per camera) should be saved for the calibration.
+    """
+
+    def __init__(self, board_size=(4, 7), max_side=320, min_pose_change=0.1, min_interval=0.5):
+        """
+        Parameters:
+            board_size: Number of inner corners of the chessboard.
+            max_side: Largest side of the downscaled copy used for the check.
+            min_pose_change: Minimum mean corner displacement (fraction of the image) from every saved pose.
+            min_interval: Minimum time in seconds between two automatic captures.
+        """
+        self.board_size = tuple(board_size)
+        self.max_side = max_side
+        self.min_pose_change = min_pose_change
+        self.min_interval = min_interval
+        self._saved_poses = []
+        self._last_capture = 0.0
+        self.visible = []  # Board visible in each camera, for the last frames checked
+
+    def _distance(self, pose, saved):
+        # The board can be detected in either corner order (rotated by 180 degrees)
+        direct = np.linalg.norm(pose - saved, axis=-1).mean()
+        reverse = np.linalg.norm(pose - saved[:, ::-1], axis=-1).mean()
+        return min(direct, reverse)
+
+    def check(self, frames):
+        """
+        Parameters:
+            frames: One BGR image per camera.
+        Returns:
+            True if the frames should be saved.
+        """
+        corners = [fast_board_check(frame, self.board_size, self.max_side) for frame in frames]
+        self.visible = [c is not None for c in corners]
+        if not all(self.visible):
+            return False
+        if time.monotonic() - self._last_capture < self.min_interval:
+            return False
+
+        pose = np.stack(corners)
+        if any(self._distance(pose, saved) < self.min_pose_change for saved in self._saved_poses):
+            return False
+
+        self._saved_poses.append(pose)
+        self._last_capture = time.monotonic()
+        return True
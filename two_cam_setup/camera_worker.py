@@ -0,0 +1,218 @@
+import cv2 as cv
+import multiprocessing
+import numpy as np
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+
+# Shared modules of the single camera setup (PoseTracker, ...)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'one_cam_setup'))
+from poseTracker import PoseTracker
+from synchronized_capture import grab_timestamp
+
+"""
+One process per camera: capture and MediaPipe inference run in a worker process, so that the
+cameras of the stereo rig are processed in parallel on separate cores.
+
+Frames are written by the worker into a ring of slots in shared memory; only the slot index and the
+small keypoint arrays go through the result queue. The coordinator reads the frame directly from
+shared memory and hands the slot back (release) once it is done with it.
+
+With triggered=True, a worker only grabs when the coordinator calls trigger(): triggering all the
+workers at once grabs the cameras back to back on every tick, instead of each camera free-running on
+its own schedule.
+"""
+
+
+def _fit_frame(frame, frame_shape):
+    # Center crop to the calibrated width, then resize if the camera gives another resolution.
+    height, width = frame_shape[:2]
+    if frame.shape[1] > width and frame.shape[0] == height:
+        left = frame.shape[1] // 2 - width // 2
+        frame = frame[:, left:left + width]
+    if frame.shape[:2] != (height, width):
+        frame = cv.resize(frame, (width, height))
+    return frame
+
+
+def _camera_process(source, capture_shape, frame_shape, shm_name, slot_count, camera_matrix, dist_coeffs,
+                    tracker_options, free_slots, results, stop_event, trigger_event):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slot_count,) + tuple(frame_shape), dtype=np.uint8, buffer=shm.buf)
+
+    cap = cv.VideoCapture(source)
+    cap.set(3, capture_shape[1])
+    cap.set(4, capture_shape[0])
+    if not isinstance(source, str):
+        # Keep a single frame in the driver buffer: a grab returns a recent frame, not one that
+        # waited in the buffer while the worker was busy (and would get a stale timestamp).
+        cap.set(cv.CAP_PROP_BUFFERSIZE, 1)
+    tracker = PoseTracker(camera_matrix, dist_coeffs, undistortion_mode="points", **tracker_options)
+
+    frame_number = 0
+    try:
+        while not stop_event.is_set():
+            # Wait for a free slot (the coordinator is still using all the others).
+            slot = None
+            while slot is None and not stop_event.is_set():
+                try:
+                    slot = free_slots.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if slot is None:
+                break
+
+            # Wait for the coordinator's tick: all the cameras are grabbed at the same time.
+            if trigger_event is not None:
+                while not trigger_event.wait(0.1):
+                    if stop_event.is_set():
+                        break
+                if stop_event.is_set():
+                    break
+                trigger_event.clear()
+
+            # Timestamp taken right after the grab, before decoding (see synchronized_capture).
+            if not cap.grab():
+                break
+            capture_time = grab_timestamp(cap, source)
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+
+            frames[slot] = _fit_frame(frame, frame_shape)
+
+            # Inference directly on the shared frame, only the keypoints go back to the coordinator.
+            tracker.detect(frames[slot])
+            keypoints = tracker.keypoints(frame_shape)
+            image_keypoints = tracker.keypoints(frame_shape, tracker.image_landmarks)
+            results.put((slot, frame_number, capture_time, keypoints, image_keypoints))
+            frame_number += 1
+    finally:
+        # End of stream marker
+        results.put(None)
+        cap.release()
+        tracker.close()
+        del frames
+        shm.close()
+
+
+class CameraWorker:
+    """
+    Capture and pose detection of one camera in a separate process.
+    """
+
+    def __init__(self, source, camera_matrix=None, dist_coeffs=None, frame_shape=(720, 720, 3),
+                 capture_shape=(720, 1280), slots=4, triggered=False, **tracker_options):
+        """
+        Parameters:
+        source (int or str): Camera id or video file.
+        camera_matrix (np.ndarray): Intrinsics of the camera, used to undistort the keypoints.
+        dist_coeffs (np.ndarray): Distortion coefficients of the camera.
+        frame_shape (tuple): Shape of the frames given to MediaPipe (calibrated resolution).
+        capture_shape (tuple): Resolution requested from the camera (height, width).
+        slots (int): Number of frames of the shared memory ring.
+        triggered (bool): Grab only when trigger() is called (one grab per call), instead of free-running.
+        **tracker_options: Options of the PoseTracker (min_detection_confidence, roi, ...).
+        """
+        self.source = source
+        self.frame_shape = tuple(frame_shape)
+        self.slot_count = slots
+
+        frame_size = int(np.prod(self.frame_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=frame_size * slots)
+        self._frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+
+        context = multiprocessing.get_context("spawn")
+        self._free_slots = context.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+        self._results = context.Queue()
+        self._stop_event = context.Event()
+        self._trigger_event = context.Event() if triggered else None
+
+        if camera_matrix is not None:
+            camera_matrix = np.array(camera_matrix)
+            dist_coeffs = np.array(dist_coeffs)
+        self._process = context.Process(
+            target=_camera_process,
+            args=(source, capture_shape, self.frame_shape, self._shm.name, slots, camera_matrix, dist_coeffs,
+                  tracker_options, self._free_slots, self._results, self._stop_event, self._trigger_event),
+            name=f"camera-{source}",
+            daemon=True,
+        )
+        self._ended = False
+
+    def start(self):
+        """Starts the worker process. Returns the worker."""
+        self._process.start()
+        return self
+
+    def trigger(self):
+        """
+        Asks a triggered worker to grab its next frame. Call it once per frame, after the result of
+        the previous trigger was received with get (a trigger is a flag, not a counter).
+        """
+        self._trigger_event.set()
+
+    def get(self, timeout=1.0):
+        """
+        Waits for the next processed frame.
+
+        Parameters:
+        timeout (float): Interval between two checks that the worker is still alive.
+
+        Returns:
+        tuple: (slot, frame_number, capture_time, keypoints, image_keypoints), or None at the end of
+        the stream. capture_time is a monotonic timestamp comparable between workers (see
+        synchronized_capture.grab_timestamp). keypoints are undistorted pixel coordinates (17, 3) for the triangulation,
+        image_keypoints are the raw coordinates for drawing on the frame.
+        """
+        while not self._ended:
+            try:
+                item = self._results.get(timeout=timeout)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._ended = True
+                continue
+            if item is None:
+                self._ended = True
+            return item
+        return None
+
+    def frame(self, slot):
+        """
+        Parameters:
+        slot (int): Slot returned by get.
+
+        Returns:
+        np.ndarray: The frame, in shared memory (valid until release).
+        """
+        return self._frames[slot]
+
+    def release(self, slot):
+        """Hands a slot back to the worker."""
+        self._free_slots.put(slot)
+
+    def stop(self):
+        """Stops the worker process and frees the shared memory."""
+        if self._shm is None:
+            return
+        self._stop_event.set()
+        if self._process.pid is not None:
+            # Drain the results so that the worker can flush its queue and exit.
+            deadline = time.time() + 5
+            while self._process.is_alive() and time.time() < deadline:
+                try:
+                    self._results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process.join()
+
+        del self._frames
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
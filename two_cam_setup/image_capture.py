@@ -1,13 +1,16 @@
 import cv2 as cv
 import os
 import sys
+from image_writer import ImageWriter
+from auto_capture import AutoCapture
 
-def capture_calibration_images(file_path, id_cam):
+def capture_calibration_images(file_path, id_cam, auto=False):
     """
     Capture des images avec un échiquier pour la calibration de la caméra.    
     Args:
         file_path : the file where we need to save the pictures. Used for two camera setup.
         id_cam : to choose with camera to use. Again used essentially for two camera setup.
+        auto : save an image automatically when the board is visible in a new pose.
     Returns:
         None
     """
@@ -25,9 +28,14 @@ def capture_calibration_images(file_path, id_cam):
         os.makedirs(file_path)
     
     img_counter = 0
-    
+
+    # Images écrites en arrière-plan : l'aperçu n'est jamais figé
+    writer = ImageWriter()
+    auto_capture = AutoCapture() if auto else None
 
     print("Appuyez sur ESPACE pour capturer une image, 'q' pour quitter")
+    if auto:
+        print("Capture automatique : déplacez l'échiquier, une image est enregistrée à chaque nouvelle position")
     print("Capturez au moins 10-20 images de l'échiquier sous différents angles")
     
     while True:
@@ -38,14 +46,23 @@ def capture_calibration_images(file_path, id_cam):
         if frame.shape[1] != 720:
             frame = frame[:,frame_shape[1]//2 - frame_shape[0]//2:frame_shape[1]//2 + frame_shape[0]//2]
 
-            
-        cv.imshow('Capture - Appuyez sur ESPACE pour capturer', frame)
+
+        # Vérification rapide de l'échiquier sur chaque frame (mode automatique)
+        save = auto_capture is not None and auto_capture.check([frame])
+
+        preview = frame
+        if auto_capture is not None:
+            preview = frame.copy()
+            color = (0, 255, 0) if auto_capture.visible[0] else (0, 0, 255)
+            cv.putText(preview, f"AUTO - {img_counter} images", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+        cv.imshow('Capture - Appuyez sur ESPACE pour capturer', preview)
         
         key = cv.waitKey(1) & 0xFF
         
-        if key == ord(' '):  # Espace pour capturer
+        if key == ord(' ') or save:  # Espace pour capturer
             img_name = f"{file_path}/img_{img_counter:02d}.png"
-            cv.imwrite(img_name, frame)
+            writer.save(img_name, frame)
             print(f"Image sauvegardée: {img_name}")
             img_counter += 1
             
@@ -54,12 +71,20 @@ def capture_calibration_images(file_path, id_cam):
     
     cap.release()
     cv.destroyAllWindows()
-    print(f"Capture terminée. {img_counter} images sauvegardées.")
+    writer.close()
+    print(f"Capture terminée. {writer.saved} images sauvegardées.")
 
 if __name__ == "__main__":
 
-    if len(sys.argv) == 3:
-        file_path = str(sys.argv[1])
-        id_cam = int(sys.argv[2])
+    # --auto : capture automatique
+    auto = "--auto" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--auto"]
+
+    if len(args) == 2:
+        file_path = str(args[0])
+        id_cam = int(args[1])
+
+        capture_calibration_images(file_path, id_cam, auto)
 
-    capture_calibration_images(file_path, id_cam)
\ No newline at end of file
+    else:
+        print("Utilisation: python3 image_capture.py <chemin_dossier> <id_cam> [--auto]")
\ No newline at end of file
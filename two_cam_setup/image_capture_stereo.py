@@ -2,8 +2,12 @@ import cv2 as cv
 import numpy as np
 import os 
 import sys
+from synchronized_capture import SynchronizedCapture
+from index_cam import discover_cameras
+from image_writer import ImageWriter
+from auto_capture import AutoCapture
 
-def capture_image_stereo(file_path1, file_path2, id_cam1, id_cam2):
+def capture_image_stereo(file_path1, file_path2, id_cam1, id_cam2, auto=False):
 
     """
     FR: 
@@ -19,65 +23,90 @@ def capture_image_stereo(file_path1, file_path2, id_cam1, id_cam2):
         file_path2: The path to the folder of images for the second cam.
         id_cam1: The ID of the first camera.
         id_cam2: The ID of the second camera.
+        auto: Save the images automatically when the board is visible in both cameras in a new pose.
     Returns:
         None
     """
-    # Initialisation des caméras
-    # Initializing the cameras
-    cap1 = cv.VideoCapture(id_cam1)
-    cap2 = cv.VideoCapture(id_cam2)
+    capture_images_multi([file_path1, file_path2], [id_cam1, id_cam2], auto)
 
-    # Tuple des caméras pour permettre d'appliquer des paramètres communs facilement.
-    # Tuple of cameras to allow easy application of common parameters.
-    caps = [cap1, cap2]
+def capture_images_multi(file_paths, id_cams, auto=False):
 
+    """
+    FR: 
+    Capture en simultané d'une image à partir de N caméras pour la calibration du système de caméras.
+    Ces images sont enregistrées dans des dossiers séparés pour chaque caméra, avec le même nom.
+
+    EN: 
+    Simultaneous capture of an image from N cameras for the calibration of the camera rig.
+    These images are saved in separate folders for each camera, with the same name.
+
+    Parameters: 
+        file_paths: The paths to the folders of images, one per cam.
+        id_cams: The IDs of the cameras, in the same order.
+        auto: Save the images automatically when the board is visible in all cameras in a new pose.
+    Returns:
+        None
+    """
     # Changement de la résolution à celle que nous allons utiliser ensuite.
     # Changing the resolution to the one we will be using next. 
     frame_shape = [720, 1280]
 
-    # Définir la résolution des caméras
-    # Set the resolution of the cameras
-    for cap in caps:
-        cap.set(3, frame_shape[1])
-        cap.set(4, frame_shape[0])
+    # Initialisation des caméras : capture synchronisée (grab de toutes les caméras puis décodage,
+    # appariement des images par timestamp).
+    # Initializing the cameras: synchronized capture (all cameras grabbed before decoding,
+    # frames matched by timestamp).
+    capture = SynchronizedCapture(id_cams, frame_shape=frame_shape)
 
     # Créer les dossiers pour stocker les images de calibration
     # Create folders to store calibration images
-    if not os.path.exists(file_path1):
-        os.makedirs(file_path1)
-    if not os.path.exists(file_path2):
-        os.makedirs(file_path2)
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            os.makedirs(file_path)
 
     img_counter = 0
 
+    # Images écrites en arrière-plan : l'aperçu n'est jamais figé et les caméras restent synchronisées
+    # Images written in the background: the preview never freezes and the cameras stay in sync
+    writer = ImageWriter()
+    auto_capture = AutoCapture() if auto else None
+
     print("Appuyez sur ESPACE pour capturer une image, 'q' pour quitter")
     print("Capturez au moins 10-20 images de l'échiquier sous différents angles")
+    if auto:
+        print("Capture automatique : une image est enregistrée quand l'échiquier est visible par toutes les caméras dans une nouvelle position")
 
     while True:
-        ret1, frame1 = cap1.read()
-        ret2, frame2 = cap2.read()
+        ret, frames, _ = capture.read()
 
         # Dans le cas où les caméras ne sont pas accessibles.
         # In case the cameras are not accessible.
-        if not ret1 or not ret2:
+        if not ret:
             break
 
         # Redimensionner les images en 720x720.
         # Crop to 720x720.
-        if frame1.shape[1] != 720:
-            frame1 = frame1[:, frame_shape[1] // 2 - frame_shape[0] // 2: frame_shape[1] // 2 + frame_shape[0] // 2]
-        
-        if frame2.shape[1] != 720:
-            frame2 = frame2[:, frame_shape[1] // 2 - frame_shape[0] // 2: frame_shape[1] // 2 + frame_shape[0] // 2]
-
-        # Ajouter des labels sur chaque frame
-        # Add labels on each frame
-        cv.putText(frame1, "Camera 0", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        cv.putText(frame2, "Camera 1", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-
-        # Affichage côte à côte des deux caméras
-        # Display side by side of the two cameras
-        combined_frame = np.hstack((frame1, frame2))
+        for i, frame in enumerate(frames):
+            if frame.shape[1] != 720:
+                frames[i] = frame[:, frame_shape[1] // 2 - frame_shape[0] // 2: frame_shape[1] // 2 + frame_shape[0] // 2]
+
+        # Vérification rapide de l'échiquier sur chaque frame (mode automatique)
+        # Fast chessboard check on every frame (automatic mode)
+        save = auto_capture is not None and auto_capture.check(frames)
+
+        # Affichage côte à côte des caméras, avec des labels sur chaque frame
+        # Display side by side of the cameras, with labels on each frame
+        labeled = [frame.copy() for frame in frames]
+        for i, frame in enumerate(labeled):
+            color = (255, 255, 255)
+            if auto_capture is not None:
+                color = (0, 255, 0) if auto_capture.visible[i] else (0, 0, 255)
+            cv.putText(frame, f"Camera {i}", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+        combined_frame = np.hstack(labeled)
+
+        # Décalage mesuré entre les caméras
+        # Measured skew between the cameras
+        cv.putText(combined_frame, f"Skew: {capture.skew.last * 1000:.1f} ms", (10, 70),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
 
         cv.imshow('Capture - Appuyez sur ESPACE pour capturer', combined_frame)
 
@@ -85,12 +114,11 @@ def capture_image_stereo(file_path1, file_path2, id_cam1, id_cam2):
 
         # Si la touche espace est pressée, sauvegarder les images
         # If the space key is pressed, save the images
-        if key == ord(' '):
-            img_name1 = f"{file_path1}/img_{img_counter:02d}.png"
-            img_name2 = f"{file_path2}/img_{img_counter:02d}.png"
-            cv.imwrite(img_name1, frame1)
-            cv.imwrite(img_name2, frame2)
-            print(f"Images sauvegardées: {img_name1} et {img_name2}")
+        if key == ord(' ') or save:
+            img_names = [f"{file_path}/img_{img_counter:02d}.png" for file_path in file_paths]
+            for img_name, frame in zip(img_names, frames):
+                writer.save(img_name, frame)
+            print(f"Images sauvegardées: {', '.join(img_names)}")
             img_counter += 1
 
         # Si la touche 'q' est pressée, quitter la boucle
@@ -99,21 +127,39 @@ def capture_image_stereo(file_path1, file_path2, id_cam1, id_cam2):
             break
 
     cv.destroyAllWindows()
-    for cap in caps:
-        cap.release()
+    capture.release()
+    writer.close()
 
-    print(f"Capture terminée. {img_counter} images sauvegardées dans {file_path1} et {file_path2}.")
+    print(f"Capture terminée. {img_counter} images sauvegardées dans {', '.join(file_paths)}.")
+    print(f"Décalage moyen entre les caméras: {capture.skew.mean() * 1000:.1f} ms "
+          f"(max {capture.skew.max() * 1000:.1f} ms), {capture.skew.dropped} images non appariées.")
 
 if __name__ == "__main__":
 
-    if len(sys.argv) == 5:
-        file_path1 = sys.argv[1]
-        file_path2 = sys.argv[2]
-        id_cam1 = int(sys.argv[3])
-        id_cam2 = int(sys.argv[4])
-
-        capture_image_stereo(file_path1, file_path2, id_cam1, id_cam2)
+    # Autant de dossiers que de caméras : <dossier_cam1> ... <dossier_camN> <id_cam1> ... <id_camN>
+    # As many folders as cameras: <folder_cam1> ... <folder_camN> <id_cam1> ... <id_camN>
+    # --auto : capture automatique / automatic capture
+    auto = "--auto" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--auto"]
+    if len(args) >= 4 and len(args) % 2 == 0:
+        count = len(args) // 2
+        file_paths = args[:count]
+        id_cams = [int(arg) for arg in args[count:]]
+
+        capture_images_multi(file_paths, id_cams, auto)
+
+    # Dossiers seuls : caméras détectées automatiquement (résultat en cache, voir index_cam.py)
+    # Folders only: cameras detected automatically (cached result, see index_cam.py)
+    elif len(args) >= 2 and not any(arg.isdigit() for arg in args):
+        cameras = discover_cameras()
+        if len(cameras) < len(args):
+            print(f"{len(args)} caméras demandées, {len(cameras)} trouvées: {[camera['index'] for camera in cameras]}")
+        else:
+            capture_images_multi(args, [camera["index"] for camera in cameras[:len(args)]], auto)
     
     else:
         print("Erreur dans l'utilisation des arguments.")
-        print("Utilisation: python3 image_capture_stereo.py <chemin_dossier_cam1> <chemin_dossier_cam2> <id_cam1> <id_cam2>")
\ No newline at end of file
+        print("Utilisation: python3 image_capture_stereo.py <chemin_dossier_cam1> <chemin_dossier_cam2> <id_cam1> <id_cam2>")
+        print("Avec N caméras: python3 image_capture_stereo.py <dossier_cam1> ... <dossier_camN> <id_cam1> ... <id_camN>")
+        print("Détection automatique des caméras: python3 image_capture_stereo.py <dossier_cam1> ... <dossier_camN>")
+        print("Ajouter --auto pour enregistrer automatiquement les images quand l'échiquier est visible.")
@@ -0,0 +1,71 @@
+import cv2 as cv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+FR:
+Écriture des images en arrière-plan : cv.imwrite (compression PNG) prend des dizaines de millisecondes,
+ce qui figeait l'aperçu et pouvait désynchroniser les caméras. Les images sont confiées à un pool de
+threads et la boucle de capture continue immédiatement.
+--------------------------------------------------------------------------------------------
+EN:
+Background image writing: cv.imwrite (PNG compression) takes tens of milliseconds, which froze the
+preview and could desync the cameras. The images are handed to a thread pool and the capture loop
+carries on immediately.
+"""
+
+
+class ImageWriter:
+    """
+    Pool of threads writing images to disk.
+    """
+
+    def __init__(self, workers=2, max_pending=32):
+        """
+        Parameters:
+            workers: Number of writing threads.
+            max_pending: Maximum number of images waiting to be written (save blocks beyond that).
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.saved = 0
+        self.failed = []
+
+    def save(self, path, frame):
+        """
+        Queues an image for writing. The frame must not be modified afterwards.
+
+        Parameters:
+            path: The path of the image.
+            frame: The image.
+        Returns:
+            None
+        """
+        self._slots.acquire()
+        self._executor.submit(self._write, path, frame)
+
+    def _write(self, path, frame):
+        try:
+            ok = cv.imwrite(path, frame)
+        except cv.error:
+            ok = False
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            if ok:
+                self.saved += 1
+            else:
+                self.failed.append(path)
+                print(f"Erreur d'écriture / Write error: {path}")
+
+    def close(self):
+        """Waits until all the queued images are written."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,26 +1,173 @@
 import cv2 as cv
+import hashlib
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+# Shared modules of the single camera setup (calibration cache, ...)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'one_cam_setup'))
+import calibrationCache as cache
 
 """
 FR:
 Ce script détecte les cameras/webcam disponibles sur le système. Il essaie de se connecter à chaque caméra de l'index 0 à 4. Si une caméra est trouvée, son index sera affiché.
+Les caméras sont testées en parallèle, avec un délai maximum par caméra, et le résultat est mis en cache : tant que
+les périphériques branchés ne changent pas, les outils de capture démarrent sans tester à nouveau les caméras
+(Linux uniquement : ailleurs, les périphériques ne peuvent pas être listés et les caméras sont toujours testées).
 --------------------------------------------------------------------------------------------
 EN:
 This script detects available cameras/webcams on the system. It attempts to connect to each camera from index 0 to 4. If a camera is found, its index will be displayed.
+The cameras are probed concurrently, with a timeout per camera, and the result is cached: as long as the plugged
+devices do not change, the capture tools start without probing the cameras again
+(Linux only: elsewhere the devices cannot be listed and the cameras are always probed).
 """
 
-cam_index = []
-for i in range(5):
-    #Tentative de connexion à la caméra à l'index i
-    #Trying to connect to the camera at index i
-    cap = cv.VideoCapture(i)
-
-    # Vérifier si la caméra est ouverte avec succès
-    # Check if the camera is opened successfully
-    if cap.read()[0]:
-        print(f"Caméra trouvée à l'index {i}")
-        cam_index.append(i)
+# Indices testés par défaut
+# Indices probed by default
+CANDIDATE_INDICES = range(5)
+
+# Résolutions testées (largeur, hauteur)
+# Probed resolutions (width, height)
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+CACHE_FILE = os.path.join(cache.CACHE_DIR, "cameras.json")
+
+
+def probe_camera(index, resolutions=RESOLUTIONS):
+    """
+    FR: Teste une caméra et relève les résolutions et FPS qu'elle accepte.
+    EN: Probes a camera and reports the resolutions and FPS it accepts.
+
+    Parameters:
+        index: The index of the camera.
+        resolutions: The resolutions (width, height) to try.
+    Returns:
+        dict {"index", "backend", "modes": [[width, height, fps], ...]}, or None if no camera was found.
+    """
+    cap = cv.VideoCapture(index)
+    try:
+        # Vérifier si la caméra est ouverte avec succès
+        # Check if the camera is opened successfully
+        if not cap.isOpened() or not cap.read()[0]:
+            return None
+
+        modes = []
+        for width, height in resolutions:
+            cap.set(3, width)
+            cap.set(4, height)
+            # La caméra choisit la résolution la plus proche qu'elle supporte
+            # The camera picks the closest resolution it supports
+            mode = [int(cap.get(3)), int(cap.get(4)), round(cap.get(cv.CAP_PROP_FPS), 2)]
+            if mode not in modes:
+                modes.append(mode)
+
+        return {"index": index, "backend": cap.getBackendName(), "modes": modes}
+    finally:
         cap.release()
-    else:
-        print(f"Aucune caméra trouvée à l'index {i}")
-    
-print(f"Caméras disponibles: {cam_index}")
+
+
+def device_set_key(indices=CANDIDATE_INDICES):
+    """
+    FR: Clé de l'ensemble des périphériques branchés (change quand une caméra est branchée ou débranchée).
+    EN: Key of the set of plugged devices (changes when a camera is plugged or unplugged).
+
+    Parameters:
+        indices: The probed indices.
+    Returns:
+        str: The key (hexadecimal), or None where the plugged devices cannot be listed (not Linux).
+    """
+    # Sans liste des périphériques (Windows, macOS), la clé ne changerait jamais : pas de cache
+    # Without a device list (Windows, macOS), the key would never change: no cache
+    if not sys.platform.startswith("linux"):
+        return None
+
+    h = hashlib.sha256(json.dumps([sys.platform, list(indices)]).encode())
+    # Linux : les noeuds /dev/video* sont recréés à chaque branchement
+    # Linux: the /dev/video* nodes are recreated on every plug
+    for device in sorted(glob.glob("/dev/video*")):
+        h.update(f"{device}:{os.stat(device).st_ctime_ns}".encode())
+    return h.hexdigest()
+
+
+def _load_cache():
+    try:
+        with open(CACHE_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(entries):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entries, f, indent=1)
+    os.replace(tmp_path, CACHE_FILE)
+
+
+def discover_cameras(indices=CANDIDATE_INDICES, timeout=5.0, resolutions=RESOLUTIONS, refresh=False):
+    """
+    FR: Détecte les caméras disponibles, en parallèle, avec un délai maximum par caméra. Le résultat est
+    mis en cache pour l'ensemble des périphériques branchés (Linux uniquement).
+    EN: Detects the available cameras, concurrently, with a timeout per camera. The result is cached for
+    the set of plugged devices (Linux only).
+
+    Parameters:
+        indices: The indices to probe.
+        timeout: Maximum time in seconds given to each camera.
+        resolutions: The resolutions (width, height) to try.
+        refresh: Probe the cameras even if the result is cached.
+    Returns:
+        list of dicts (see probe_camera), sorted by index.
+    """
+    indices = list(indices)
+    key = device_set_key(indices)
+    entries = _load_cache()
+    if not refresh and key is not None and key in entries:
+        return entries[key]
+
+    results = {}
+
+    def probe(index):
+        results[index] = probe_camera(index, resolutions)
+
+    # Threads démons : une caméra bloquée n'empêche pas le programme de se terminer
+    # Daemon threads: a stuck camera does not prevent the program from exiting
+    threads = [threading.Thread(target=probe, args=(index,), name=f"probe-camera-{index}", daemon=True)
+               for index in indices]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    cameras = [results[index] for index in indices if results.get(index) is not None]
+    timed_out = [index for index, thread in zip(indices, threads) if thread.is_alive()]
+    if timed_out:
+        print(f"Délai dépassé pour les caméras {timed_out} / Timeout for cameras {timed_out}")
+    elif key is not None:
+        # Un résultat incomplet n'est pas mis en cache
+        # An incomplete result is not cached
+        entries[key] = cameras
+        _save_cache(entries)
+    return cameras
+
+
+if __name__ == "__main__":
+
+    refresh = "--refresh" in sys.argv
+    cameras = discover_cameras(refresh=refresh)
+
+    found = {camera["index"]: camera for camera in cameras}
+    for i in CANDIDATE_INDICES:
+        if i in found:
+            modes = ", ".join(f"{w}x{h}@{fps:g}" for w, h, fps in found[i]["modes"])
+            print(f"Caméra trouvée à l'index {i} ({found[i]['backend']}): {modes}")
+        else:
+            print(f"Aucune caméra trouvée à l'index {i}")
+
+    print(f"Caméras disponibles: {sorted(found)}")
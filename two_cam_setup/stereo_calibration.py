@@ -1,68 +1,122 @@
 import cv2 as cv 
 import glob
+import os
+import sys
 import numpy as np
 
+# Shared modules of the single camera setup (calibration cache, ...)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'one_cam_setup'))
+import calibrationCache as cache
+import cornerDetection as cd
+import viewSelection as vs
+
+import triangulation
+
 # Based on : http://temugeb.github.io/opencv/python/2021/02/02/stereo-camera-calibration-and-triangulation.html
 
+# Chessboard (inner corners), size of a square and size of the calibrated images (width, height).
+BOARD_SIZE = (4, 7)
+WORLD_SCALING = 1
+IMAGE_SIZE = (720, 720)
+
+
+def mono_cache_key(images_names):
+    """
+    This function computes the cache key of a camera calibration (see calibrationCache).
+
+    Parameters:
+    images_names (list): Sorted paths of the chessboard images.
+
+    Returns:
+    str: The cache key.
+    """
+    return cache.calibration_key("mono", images_names, BOARD_SIZE, WORLD_SCALING, IMAGE_SIZE,
+                                 extra=["select_views", vs.DEFAULT_MIN_DISTANCE])
+
+
+def stereo_cache_key(mtx1, dist1, mtx2, dist2, img_names1, img_names2):
+    """
+    This function computes the cache key of a stereo calibration (see calibrationCache).
+
+    Parameters:
+    mtx1, dist1, mtx2, dist2 (np.ndarray): Intrinsics of both cameras.
+    img_names1, img_names2 (list): Sorted paths of the paired chessboard images.
+
+    Returns:
+    str: The cache key.
+    """
+    return cache.calibration_key("stereo", img_names1 + img_names2, BOARD_SIZE, WORLD_SCALING, IMAGE_SIZE,
+                                 extra=[len(img_names1), mtx1, dist1, mtx2, dist2, "select_views", vs.DEFAULT_MIN_DISTANCE],
+                                 ordered=True)
 
-def calibrate_camera(images_folder):
+
+def calibrate_camera(images_folder, preview=True, workers=None):
     """
     This function calibrates a camera using a set of chessboard images.
 
     Parameters:
     images_folder (str): Path to the folder containing chessboard images.
+    preview (bool): Show the detected corners on each image. False for a non-interactive run.
+    workers (int): Number of processes used for corner detection (default: number of cores).
     
     Returns:
     tuple: Camera matrix and distortion coefficients.
 
+    The result is cached, keyed on the content of the images, the board geometry and the image size.
     """
-    images_names = glob.glob(images_folder)
-    images = []
-    for imname in images_names:
-        img = cv.imread(imname, 1)
-        images.append(img)
+    images_names = sorted(glob.glob(images_folder))
+
+    rows, columns = BOARD_SIZE
+    world_scaling = WORLD_SCALING
 
-    criteria = (cv.TERM_CRITERIA_EPS + cv.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    #thoses are the dimensions of the images we will use
+    width, height = IMAGE_SIZE
+
+    # Only recalibrate when the inputs actually changed.
+    cache_key = mono_cache_key(images_names)
+    calibration = cache.load_calibration("mono", cache_key)
+    if calibration is not None:
+        print('cached calibration loaded for', images_folder)
+        return calibration['mtx'], calibration['dist']
 
-    rows = 4
-    columns = 7
-    world_scaling = 1
+    criteria = cd.DEFAULT_CRITERIA
 
     objp = np.zeros((rows * columns, 3), np.float32)
     objp[:,:2] = np.mgrid[0:rows, 0:columns].T.reshape(-1, 2)
     objp *= world_scaling
-    
-    #thoses are the dimensions of the images we will use
-    width = 720 #images[0].shape[1] 
-    height = 720 #images[0].shape[0]
 
     imgpoints = []
-    objpoints = []
-    
-    for img in images:
-        gray = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
+    found_names = []
 
-        ret, corners = cv.findChessboardCorners(gray, (rows, columns), None)
+    # Corner detection runs in a process pool (corners of images already seen are read from the cache).
+    detections = cd.detect_corners(images_names, (rows, columns), criteria, workers=workers)
 
+    for imname, (ret, corners, _) in zip(images_names, detections):
         if ret:
-            conv_size = (11, 11)
-            corners = cv.cornerSubPix(gray, corners, conv_size, (-1, -1), criteria)
-            cv.drawChessboardCorners(img, (rows, columns), corners, ret)
-            cv.imshow('img', img)
-            k = cv.waitKey(50)
-            objpoints.append(objp)
+            if preview:
+                cd.preview_corners(imname, (rows, columns), corners, 'img', delay=50)
+            found_names.append(imname)
             imgpoints.append(corners)
 
+    # Drop the redundant views (board in almost the same pose) before calibrating.
+    kept = vs.select_views(imgpoints, (width, height))
+    imgpoints = [imgpoints[i] for i in kept]
+    objpoints = [objp] * len(imgpoints)
+    kept_names = [found_names[i] for i in kept]
+    print(f'{len(kept_names)}/{len(found_names)} views kept:', kept_names)
+
     ret, mtx, dist, rvecs, tvecs = cv.calibrateCamera(objpoints, imgpoints, (width, height), None, None)
     print ('rmse:', ret)
     print('camera matrix:\n', mtx)
     print('Rs:\n', rvecs)
     print('Ts:\n', tvecs)
 
+    cache.save_calibration("mono", cache_key, mtx=mtx, dist=dist, rmse=np.float64(ret), kept_images=np.array(kept_names))
+
     return mtx, dist
         
 
-def calibrate_stereo (mtx1, dist1, mtx2, dist2, images_folder1, images_folder2):
+def calibrate_stereo (mtx1, dist1, mtx2, dist2, images_folder1, images_folder2, preview=True, workers=None):
     """
     This function calibrates a stereo camera system using two sets of chessboard images.
 
@@ -74,104 +128,334 @@ def calibrate_stereo (mtx1, dist1, mtx2, dist2, images_folder1, images_folder2):
         dist2 : distortion coefficients for cam 2
         images_folder1 (str): Path to the folder containing chessboard images for camera 1.
         images_folder2 (str): Path to the folder containing chessboard images for camera 2. 
+        preview (bool): Show the detected corners of each pair. False for a non-interactive run.
+        workers (int): Number of processes used for corner detection (default: number of cores).
     returns :
         R (np.ndarray): Rotation matrix between the two cameras.
         T (np.ndarray): Translation vector between the two cameras.
+
+    The result is cached, keyed on the content of the image pairs, the board geometry, the image size
+    and the intrinsics of both cameras.
     """
     
-    img_names1 = glob.glob(images_folder1)
-    img_names2 = glob.glob(images_folder2)
-    c1_images = []
-    c2_images = []
-
-    for imname in img_names1:
-        img1 = cv.imread(imname, 1)
-        c1_images.append(img1)
-    for imname in img_names2:  
-        img2 = cv.imread(imname, 1)
-        c2_images.append(img2)
+    # Sorted so that img_XX of camera 1 is paired with img_XX of camera 2.
+    img_names1 = sorted(glob.glob(images_folder1))
+    img_names2 = sorted(glob.glob(images_folder2))
 
-    criteria = (cv.TERM_CRITERIA_EPS + cv.TERM_CRITERIA_MAX_ITER, 100, 0.0001)
+    rows, columns = BOARD_SIZE
+    world_scaling = WORLD_SCALING
+
+    width, height = IMAGE_SIZE
 
-    rows = 4
-    columns = 7
-    world_scaling = 1
+    # Only recalibrate when the inputs actually changed.
+    cache_key = stereo_cache_key(mtx1, dist1, mtx2, dist2, img_names1, img_names2)
+    calibration = cache.load_calibration("stereo", cache_key)
+    if calibration is not None:
+        print('cached stereo calibration loaded for', images_folder1, images_folder2)
+        return calibration['R'], calibration['T']
+
+    criteria = (cv.TERM_CRITERIA_EPS + cv.TERM_CRITERIA_MAX_ITER, 100, 0.0001)
     
     objp = np.zeros((rows * columns, 3), np.float32)
     objp[:,:2] = np.mgrid[0:rows, 0:columns].T.reshape(-1, 2)
     objp *= world_scaling
 
-    width = 720 #c1_images[0].shape[1]
-    height = 720 #c1_images[0].shape[0]
-
     imgpoints_left = []
     imgpoints_right = []
 
-    objpoints = []
+    pair_names = []
 
-    for frame1, frame2 in zip(c1_images, c2_images):
-        gray1 = cv.cvtColor(frame1, cv.COLOR_BGR2GRAY)
-        gray2 = cv.cvtColor(frame2, cv.COLOR_BGR2GRAY)
-        ret1, corners1 = cv.findChessboardCorners(gray1, (rows, columns), None)
-        ret2, corners2 = cv.findChessboardCorners(gray2, (rows, columns), None)
+    # Corner detection for both cameras in a single process pool. Same detection parameters as
+    # calibrate_camera, so that the corners already found for the mono calibrations are reused.
+    detections = cd.detect_corners(img_names1 + img_names2, (rows, columns), cd.DEFAULT_CRITERIA, workers=workers)
+    detections1 = detections[:len(img_names1)]
+    detections2 = detections[len(img_names1):]
 
+    for imname1, imname2, (ret1, corners1, _), (ret2, corners2, _) in zip(img_names1, img_names2, detections1, detections2):
         if ret1 and ret2:
-            conv_size = (11, 11)
-            corners1 = cv.cornerSubPix(gray1, corners1, conv_size, (-1, -1), criteria)
-            corners2 = cv.cornerSubPix(gray2, corners2, conv_size, (-1, -1), criteria)
-    
-            cv.drawChessboardCorners(frame1, (rows, columns), corners1, ret1)
-            cv.drawChessboardCorners(frame2, (rows, columns), corners2, ret2)
-            
-            # Ajouter des labels sur chaque frame
-            cv.putText(frame1, "Camera 0", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            cv.putText(frame2, "Camera 1", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            combined_frame = np.hstack((frame1, frame2))
-            cv.imshow('Calibration stereo', combined_frame)
-
-            cv.waitKey(50)
-
-            objpoints.append(objp)
+            if preview:
+                # Ajouter des labels sur chaque frame
+                frame1 = cd.preview_corners(imname1, (rows, columns), corners1, None, label="Camera 0")
+                frame2 = cd.preview_corners(imname2, (rows, columns), corners2, None, label="Camera 1")
+                combined_frame = np.hstack((frame1, frame2))
+                cv.imshow('Calibration stereo', combined_frame)
+
+                cv.waitKey(50)
+
+            pair_names.append((imname1, imname2))
             imgpoints_left.append(corners1)
             imgpoints_right.append(corners2)
 
+    # Drop the redundant pairs (board in almost the same pose in both cameras) before calibrating.
+    kept = vs.select_views(list(zip(imgpoints_left, imgpoints_right)), (width, height))
+    imgpoints_left = [imgpoints_left[i] for i in kept]
+    imgpoints_right = [imgpoints_right[i] for i in kept]
+    objpoints = [objp] * len(kept)
+    kept_names = [pair_names[i][0] for i in kept]
+    print(f'{len(kept)}/{len(pair_names)} stereo pairs kept:', kept_names)
+
     stereocalibration_flags = cv.CALIB_FIX_INTRINSIC
     ret, CM1, dist1, CM2, dist2, R, T, E, F = cv.stereoCalibrate(objpoints, imgpoints_left, imgpoints_right, mtx1, dist1, mtx2, dist2, (width, height), criteria=criteria, flags=stereocalibration_flags)
     print(ret)
+
+    cache.save_calibration("stereo", cache_key, R=R, T=T, E=E, F=F, rmse=np.float64(ret),
+                           kept_images=np.array([pair_names[i] for i in kept]))
+
     return R, T
 
 
-def DLT (P1, P2, pt1, pt2):
+def source_keys(images_folders):
+    """
+    This function computes the cache keys of the calibrations a bundle is built from: one mono key
+    per camera and one stereo key per consecutive pair. They change as soon as an image is recaptured.
+
+    Parameters:
+    images_folders (list): Chessboard images of each camera.
+
+    Returns:
+    tuple: (mono_keys, stereo_keys) lists, or None if a camera calibration is not in the cache
+    (the bundle cannot be current then).
+    """
+    names = [sorted(glob.glob(folder)) for folder in images_folders]
+    mono_keys = [mono_cache_key(images_names) for images_names in names]
+
+    intrinsics = []
+    for key in mono_keys:
+        calibration = cache.load_calibration("mono", key)
+        if calibration is None:
+            return None
+        intrinsics.append((calibration['mtx'], calibration['dist']))
+
+    stereo_keys = [stereo_cache_key(*intrinsics[i - 1], *intrinsics[i], names[i - 1], names[i])
+                   for i in range(1, len(names))]
+    return mono_keys, stereo_keys
+
+
+def _source_key_arrays(keys):
+    mono_keys, stereo_keys = keys if keys is not None else ([], [])
+    return {"mono_keys": np.array(mono_keys, dtype="U64"), "stereo_keys": np.array(stereo_keys, dtype="U64")}
+
+
+def bundle_is_current(bundle, images_folders):
+    """
+    This function checks that a (stereo or rig) bundle was built from the current calibration images.
+
+    Parameters:
+    bundle (dict): The loaded bundle.
+    images_folders (list): Chessboard images of each camera.
+
+    Returns:
+    bool: True if the cache keys stored in the bundle match the current ones.
+    """
+    keys = source_keys(images_folders)
+    if keys is None:
+        return False
+    mono_keys, stereo_keys = keys
+    return list(bundle['mono_keys']) == mono_keys and list(bundle['stereo_keys']) == stereo_keys
+
+
+# Version of the stereo calibration bundle, increased when its content changes.
+BUNDLE_VERSION = 2
+BUNDLE_PATH = os.path.join(cache.CACHE_DIR, "stereo_bundle.npz")
+
+
+def save_stereo_bundle(mtx1, dist1, mtx2, dist2, R, T, image_size=IMAGE_SIZE, path=BUNDLE_PATH, keys=None):
     """
-    This function implements the Direct Linear Transform (DLT) algorithm to compute the fundamental matrix.
+    This function computes everything derived from the stereo calibration once and saves it in a
+    single uncompressed .npz bundle: intrinsics, extrinsics, projection matrices, rectification
+    transforms and rectification remap tables of both cameras.
 
     Parameters:
-    P1 (np.ndarray): Camera matrix for camera 1.
-    P2 (np.ndarray): Camera matrix for camera 2.
-    pt1 (np.ndarray): Points in image 1.
-    pt2 (np.ndarray): Points in image 2.
+    mtx1, dist1 (np.ndarray): Intrinsics and distortion coefficients of camera 1.
+    mtx2, dist2 (np.ndarray): Intrinsics and distortion coefficients of camera 2.
+    R, T (np.ndarray): Rotation and translation from camera 1 to camera 2.
+    image_size (tuple): Calibrated image size (width, height).
+    path (str): Path of the bundle.
+    keys (tuple): Cache keys of the source calibrations (see source_keys), checked by bundle_is_current.
 
     Returns:
-    np.ndarray: Fundamental matrix.
+    str: Path of the bundle.
     """
-    A = [pt1[1]*P1[2,:] - P1[1,:],
-         P1[0,:] - pt1[0]*P1[2,:],
-         pt2[1]*P2[2,:] - P2[1,:],
-         P2[0,:] - pt2[0]*P2[2,:]]
-    print('A before reshape: ', A)
-    A = np.array(A).reshape((3,4))
-    print('A: ')
-    print(A)
+    P1 = triangulation.projection_matrix(mtx1)
+    P2 = triangulation.projection_matrix(mtx2, R, T)
 
-    B = A.transpose() @ A
-    from scipy import linalg 
-    U, s, Vh = linalg.svd(B, full_matrices = False)
+    R1, R2, rect_P1, rect_P2, Q, roi1, roi2 = cv.stereoRectify(mtx1, dist1, mtx2, dist2, image_size, R, T)
+    cam1_map1, cam1_map2 = cv.initUndistortRectifyMap(mtx1, dist1, R1, rect_P1, image_size, cv.CV_16SC2)
+    cam2_map1, cam2_map2 = cv.initUndistortRectifyMap(mtx2, dist2, R2, rect_P2, image_size, cv.CV_16SC2)
 
-    print('Triangulated point: ')
-    print(Vh[3,0:3]/ Vh[3,3])
-    return Vh[3,0:3]/ Vh[3,3]
+    cache.save_npz(path, version=np.int64(BUNDLE_VERSION), image_size=np.array(image_size, dtype=np.int64),
+                   mtx1=mtx1, dist1=dist1, mtx2=mtx2, dist2=dist2, R=R, T=T, P1=P1, P2=P2,
+                   R1=R1, R2=R2, rect_P1=rect_P1, rect_P2=rect_P2, Q=Q,
+                   roi1=np.array(roi1), roi2=np.array(roi2),
+                   cam1_map1=cam1_map1, cam1_map2=cam1_map2, cam2_map1=cam2_map1, cam2_map2=cam2_map2,
+                   **_source_key_arrays(keys))
+    return path
+
+
+def load_stereo_bundle(path=BUNDLE_PATH):
+    """
+    This function loads a stereo calibration bundle. The arrays are memory-mapped: nothing is read
+    or recomputed until it is used.
+
+    Parameters:
+    path (str): Path of the bundle.
+
+    Returns:
+    dict: Name -> array (see save_stereo_bundle), or None if the bundle does not exist or was written
+    by another version (it must then be rebuilt).
+    """
+    if not os.path.exists(path):
+        return None
+    bundle = cache.load_npz_mmap(path)
+    if int(bundle['version']) != BUNDLE_VERSION:
+        print(f"{path}: stereo calibration bundle version {int(bundle['version'])}, expected {BUNDLE_VERSION}")
+        return None
+    return bundle
+
+
+def build_stereo_bundle(images_folder1, images_folder2, preview=False, path=BUNDLE_PATH):
+    """
+    This function runs both camera calibrations and the stereo calibration (cached), then saves the bundle.
+
+    Parameters:
+    images_folder1 (str): Chessboard images of camera 1.
+    images_folder2 (str): Chessboard images of camera 2, taken at the same time.
+    preview (bool): Show the detected corners.
+    path (str): Path of the bundle.
+
+    Returns:
+    dict: The loaded bundle.
+    """
+    mtx1, dist1 = calibrate_camera(images_folder1, preview=preview)
+    mtx2, dist2 = calibrate_camera(images_folder2, preview=preview)
+    R, T = calibrate_stereo(mtx1, dist1, mtx2, dist2, images_folder1, images_folder2, preview=preview)
+    save_stereo_bundle(mtx1, dist1, mtx2, dist2, R, T, path=path, keys=source_keys([images_folder1, images_folder2]))
+    return load_stereo_bundle(path)
+
+
+RIG_BUNDLE_VERSION = 2
+RIG_BUNDLE_PATH = os.path.join(cache.CACHE_DIR, "rig_bundle.npz")
+
+
+def calibrate_rig(images_folders, preview=False, workers=None):
+    """
+    This function calibrates a rig of N cameras. Every camera is calibrated on its own, then each
+    consecutive pair (i - 1, i) is calibrated in stereo and the extrinsics are chained so that they
+    all refer to camera 0: a camera only needs to share chessboard views with its neighbour.
+
+    Parameters:
+    images_folders (list): Chessboard images of each camera, taken at the same time (same names).
+    preview (bool): Show the detected corners.
+    workers (int): Number of processes used for corner detection (default: number of cores).
+
+    Returns:
+    tuple: (intrinsics, extrinsics): lists of (mtx, dist) and (R, T) per camera, (R, T) mapping
+    camera 0 coordinates to the camera coordinates.
+    """
+    intrinsics = [calibrate_camera(folder, preview=preview, workers=workers) for folder in images_folders]
+
+    extrinsics = [(np.eye(3), np.zeros((3, 1)))]
+    for i in range(1, len(images_folders)):
+        (mtx_a, dist_a), (mtx_b, dist_b) = intrinsics[i - 1], intrinsics[i]
+        R_ab, T_ab = calibrate_stereo(mtx_a, dist_a, mtx_b, dist_b, images_folders[i - 1], images_folders[i],
+                                      preview=preview, workers=workers)
+        # x_b = R_ab x_a + T_ab and x_a = R_0a x_0 + T_0a
+        R_0a, T_0a = extrinsics[i - 1]
+        extrinsics.append((R_ab @ R_0a, R_ab @ T_0a + np.reshape(T_ab, (3, 1))))
+
+    return intrinsics, extrinsics
+
+
+def save_rig_bundle(intrinsics, extrinsics, image_size=IMAGE_SIZE, path=RIG_BUNDLE_PATH, keys=None):
+    """
+    This function saves the calibration of a rig of N cameras in a single uncompressed .npz bundle,
+    with the arrays of all the cameras stacked (camera index first).
+
+    Parameters:
+    intrinsics (list): (mtx, dist) of each camera.
+    extrinsics (list): (R, T) of each camera, relative to camera 0.
+    image_size (tuple): Calibrated image size (width, height).
+    path (str): Path of the bundle.
+    keys (tuple): Cache keys of the source calibrations (see source_keys), checked by bundle_is_current.
+
+    Returns:
+    str: Path of the bundle.
+    """
+    mtx = np.stack([np.asarray(m, dtype=np.float64) for m, _ in intrinsics])
+    dist = np.stack([np.asarray(d, dtype=np.float64).reshape(-1) for _, d in intrinsics])
+    R = np.stack([np.asarray(r, dtype=np.float64) for r, _ in extrinsics])
+    T = np.stack([np.asarray(t, dtype=np.float64).reshape(3, 1) for _, t in extrinsics])
+    P = np.stack([triangulation.projection_matrix(m, r, t) for m, r, t in zip(mtx, R, T)])
+
+    cache.save_npz(path, version=np.int64(RIG_BUNDLE_VERSION), image_size=np.array(image_size, dtype=np.int64),
+                   mtx=mtx, dist=dist, R=R, T=T, P=P, **_source_key_arrays(keys))
+    return path
+
+
+def load_rig_bundle(path=RIG_BUNDLE_PATH):
+    """
+    This function loads the calibration bundle of a rig (memory-mapped).
+
+    Parameters:
+    path (str): Path of the bundle.
+
+    Returns:
+    dict: Name -> array (see save_rig_bundle), or None if the bundle does not exist or was written by
+    another version (it must then be rebuilt).
+    """
+    if not os.path.exists(path):
+        return None
+    bundle = cache.load_npz_mmap(path)
+    if int(bundle['version']) != RIG_BUNDLE_VERSION:
+        print(f"{path}: rig calibration bundle version {int(bundle['version'])}, expected {RIG_BUNDLE_VERSION}")
+        return None
+    return bundle
+
+
+def build_rig_bundle(images_folders, preview=False, path=RIG_BUNDLE_PATH):
+    """
+    This function calibrates the rig (cached) and saves its bundle.
+
+    Parameters:
+    images_folders (list): Chessboard images of each camera.
+    preview (bool): Show the detected corners.
+    path (str): Path of the bundle.
+
+    Returns:
+    dict: The loaded bundle.
+    """
+    intrinsics, extrinsics = calibrate_rig(images_folders, preview=preview)
+    save_rig_bundle(intrinsics, extrinsics, path=path, keys=source_keys(images_folders))
+    return load_rig_bundle(path)
+
+
+def DLT (P1, P2, pt1, pt2):
+    """
+    This function triangulates a single point with the Direct Linear Transform (DLT) algorithm.
+    Kept for compatibility: use triangulation.triangulate to solve many points at once.
+
+    Parameters:
+    P1 (np.ndarray): 3x4 projection matrix of camera 1.
+    P2 (np.ndarray): 3x4 projection matrix of camera 2.
+    pt1 (np.ndarray): Point in image 1.
+    pt2 (np.ndarray): Point in image 2.
+
+    Returns:
+    np.ndarray: Triangulated 3D point.
+    """
+    points3d, _ = triangulation.triangulate(P1, P2, np.reshape(pt1, (1, 2)), np.reshape(pt2, (1, 2)))
+    return points3d[0]
 
 if __name__ == '__main__':
+    # Rig of N cameras: python3 stereo_calibration.py c1 c2 c3 ...
+    if len(sys.argv) > 2:
+        bundle = build_rig_bundle([f"{folder}/*.png" for folder in sys.argv[1:]])
+        print("Rig calibration bundle saved in", RIG_BUNDLE_PATH)
+        print("Camera positions (camera 0 frame):\n", [(-r.T @ t).ravel() for r, t in zip(bundle['R'], bundle['T'])])
+        sys.exit()
+
+    # Each image is decoded and analysed once: the stereo calibration reads the corners stored
+    # by the mono calibrations (see cornerDetection).
     mtx1, dist1 = calibrate_camera("c1/*.png")
     mtx2, dist2 = calibrate_camera("c2/*.png")
 
@@ -179,13 +463,22 @@ if __name__ == '__main__':
 
     R, T = calibrate_stereo(mtx1, dist1, mtx2, dist2, "c1/*.png", "c2/*.png")
 
+    # Reverse direction (camera 2 -> camera 1), kept as a consistency check of the stereo calibration.
     R1, T1 = calibrate_stereo(mtx2, dist2, mtx1, dist1, "c2/*.png", "c1/*.png")
     print("R:\n", R)
     print("T:\n", T)
     print("R1:\n", R1)
     print("T1:\n", T1)
 
-    
+    # Camera 1 is the world origin, camera 2 is placed with the stereo calibration.
+    # Everything derived from the calibration is saved once (the rig bundle is loaded by test.py).
+    keys = source_keys(["c1/*.png", "c2/*.png"])
+    save_stereo_bundle(mtx1, dist1, mtx2, dist2, R, T, keys=keys)
+    save_rig_bundle([(mtx1, dist1), (mtx2, dist2)], [(np.eye(3), np.zeros((3, 1))), (R, T)], keys=keys)
+    bundle = load_stereo_bundle()
+    print("Stereo calibration bundle saved in", BUNDLE_PATH)
+    P1, P2 = bundle['P1'], bundle['P2']
+
     # DU BON GROS HARDCODED POUR LA PASSION DE LA PASSION DU FUN.
     uvs1 = [[458, 86], [451, 164], [287, 181],
             [196, 383], [297, 444], [564, 194],
@@ -197,11 +490,6 @@ if __name__ == '__main__':
             [752, 488], [711, 605], [549, 651],
             [651, 663], [526, 293], [542, 290]]
 
-    points3D = []
-    for uv1, uv2 in zip(uvs1, uvs2):
-        print(uv1, uv2)
-        point3D = DLT(mtx1, mtx2, uv1, uv2)
-        points3D.append(point3D)
-    points3D = np.array(points3D)
+    points3D, errors = triangulation.triangulate(P1, P2, uvs1, uvs2)
     print("3D Points:\n", points3D)
-
+    print("Reprojection errors (px):\n", errors)
@@ -0,0 +1,180 @@
+import cv2 as cv
+import collections
+import numpy as np
+import time
+
+"""
+Synchronized capture of several cameras.
+
+cap.read() decodes a frame before the next camera is even asked for one, so two consecutive reads
+are taken milliseconds apart with a varying skew. Here all the devices are grabbed back-to-back
+first, and the frames are only decoded (retrieve) afterwards. Every frame is stamped with a
+monotonic timestamp taken right after its grab (the position in the file for video files), and
+frames are paired across cameras by nearest timestamp within a tolerance: the older frame of an
+unmatched set is dropped.
+"""
+
+# Default pairing tolerance in seconds (half a frame at 30 FPS).
+DEFAULT_TOLERANCE = 0.016
+
+
+def grab_timestamp(cap, source):
+    """
+    Parameters:
+    cap (cv.VideoCapture): Capture that has just grabbed a frame.
+    source (int or str): Camera id or video file.
+
+    Returns:
+    float: Timestamp in seconds of the grabbed frame: time.monotonic() for a camera (shared by all the
+    processes of the machine), the position in the file for a video file.
+    """
+    if isinstance(source, str):
+        return cap.get(cv.CAP_PROP_POS_MSEC) / 1000
+    return time.monotonic()
+
+
+def oldest_unmatched(timestamps, tolerance=DEFAULT_TOLERANCE):
+    """
+    Parameters:
+    timestamps (list): Timestamp of the pending frame of each camera.
+    tolerance (float): Maximum skew in seconds between the frames of a set.
+
+    Returns:
+    int: Index of the camera whose frame is too old to be paired and must be dropped, or None when
+    all the frames are within the tolerance.
+    """
+    if max(timestamps) - min(timestamps) <= tolerance:
+        return None
+    return int(np.argmin(timestamps))
+
+
+class SkewMeter:
+    """
+    Measured inter-camera skew (spread of the timestamps of each set of frames).
+    """
+
+    def __init__(self, window=120):
+        """
+        Parameters:
+        window (int): Number of sets used for the mean and the maximum.
+        """
+        self._skews = collections.deque(maxlen=window)
+        self.last = 0.0
+        self.sets = 0
+        self.dropped = 0
+
+    def add(self, timestamps):
+        """Records the skew of a set of paired frames."""
+        self.last = max(timestamps) - min(timestamps)
+        self._skews.append(self.last)
+        self.sets += 1
+
+    def mean(self):
+        """Mean skew in seconds over the window."""
+        return sum(self._skews) / len(self._skews) if self._skews else 0.0
+
+    def max(self):
+        """Maximum skew in seconds over the window."""
+        return max(self._skews) if self._skews else 0.0
+
+
+class FramePeriod:
+    """
+    Measured frame period of a camera (median interval between consecutive capture timestamps), used
+    to tie the pairing tolerance to the actual frame rate instead of assuming 30 FPS.
+    """
+
+    def __init__(self, window=30):
+        """
+        Parameters:
+        window (int): Number of intervals used for the median.
+        """
+        self._intervals = collections.deque(maxlen=window)
+        self._last = None
+
+    def add(self, timestamp):
+        """Records the capture timestamp of a new frame."""
+        if self._last is not None and timestamp > self._last:
+            self._intervals.append(timestamp - self._last)
+        self._last = timestamp
+
+    def period(self):
+        """Median frame period in seconds, or None before two frames were seen."""
+        return float(np.median(self._intervals)) if self._intervals else None
+
+    def tolerance(self, default=DEFAULT_TOLERANCE):
+        """Pairing tolerance: half the measured frame period (default until it is measured)."""
+        period = self.period()
+        return default if period is None else period / 2
+
+
+class SynchronizedCapture:
+    """
+    Capture of several cameras with back-to-back grabs and timestamp pairing.
+    """
+
+    def __init__(self, sources, tolerance=DEFAULT_TOLERANCE, frame_shape=None):
+        """
+        Parameters:
+        sources (list): Camera ids or video files.
+        tolerance (float): Maximum skew in seconds between the frames of a set.
+        frame_shape (list): Resolution requested from the cameras [height, width] (None: default).
+        """
+        self.sources = list(sources)
+        self.tolerance = tolerance
+        self.caps = [cv.VideoCapture(source) for source in self.sources]
+        if frame_shape is not None:
+            for cap in self.caps:
+                cap.set(3, frame_shape[1])
+                cap.set(4, frame_shape[0])
+
+        self.skew = SkewMeter()
+        self._pending = [None] * len(self.caps)  # (timestamp, frame) waiting for a match
+
+    def isOpened(self):
+        """True when all the devices are opened."""
+        return all(cap.isOpened() for cap in self.caps)
+
+    def _fill(self):
+        # Grab every missing frame back-to-back, decode only afterwards.
+        grabbed = []
+        for index, (cap, source) in enumerate(zip(self.caps, self.sources)):
+            if self._pending[index] is None:
+                if not cap.grab():
+                    return False
+                grabbed.append((index, grab_timestamp(cap, source)))
+
+        for index, timestamp in grabbed:
+            ret, frame = self.caps[index].retrieve()
+            if not ret:
+                return False
+            self._pending[index] = (timestamp, frame)
+        return True
+
+    def read(self):
+        """
+        Reads the next set of synchronized frames.
+
+        Returns:
+        tuple: (ret, frames, timestamps). ret is False when a device cannot be read anymore.
+        """
+        while True:
+            if not self._fill():
+                return False, None, None
+
+            timestamps = [timestamp for timestamp, _ in self._pending]
+            drop = oldest_unmatched(timestamps, self.tolerance)
+            if drop is None:
+                frames = [frame for _, frame in self._pending]
+                self._pending = [None] * len(self.caps)
+                self.skew.add(timestamps)
+                return True, frames, timestamps
+
+            # Unmatched frame: dropped, the next one of this camera is grabbed.
+            self._pending[drop] = None
+            self.skew.dropped += 1
+
+    def release(self):
+        """Releases all the devices."""
+        for cap in self.caps:
+            cap.release()
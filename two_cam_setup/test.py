@@ -1,12 +1,17 @@
 import cv2 as cv
-import mediapipe as mp
 import numpy as np
+import os
 import sys
-from stereo_calibration import calibrate_camera
+import time
+from stereo_calibration import load_rig_bundle, build_rig_bundle, bundle_is_current
+from camera_worker import CameraWorker
+from synchronized_capture import FramePeriod, SkewMeter, oldest_unmatched
+import triangulation
 
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-mp_pose = mp.solutions.pose
+# Shared modules of the single camera setup (PoseTracker, ...)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'one_cam_setup'))
+import positionFunctions as pf
+from detection import handle_key
 
 frame_shape = [720, 1280]
 
@@ -29,113 +34,175 @@ selected_landmarks = [
     29, 30
 ]
 
-# WILL NEED TO ADD PROJECTION MATRIX
-def run(input_stream1, input_stream2):
-    cap0 = cv.VideoCapture(input_stream1)
-    cap1 = cv.VideoCapture(input_stream2)
-    caps = [cap0, cap1]
-
-    # Set camera resolution if using webcam to 1280x720. Any bigger will cause some lag for hand detection
-    for cap in caps:
-        cap.set(3, frame_shape[1])
-        cap.set(4, frame_shape[0])
-
-    # Create body keypoints detector objects.
-    pose0 = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-    pose1 = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-
-    while True:
-
-        #read frames from stream
-        ret0, frame0 = cap0.read()
-        ret1, frame1 = cap1.read()
-
-        if not ret0 or not ret1: break
-
-        #crop to 720x720.
-        #Note: camera calibration parameters are set to this resolution.If you change this, make sure to also change camera intrinsic parameters
-        if frame0.shape[1] != 720:
-            frame0 = frame0[:,frame_shape[1]//2 - frame_shape[0]//2:frame_shape[1]//2 + frame_shape[0]//2]
-            frame1 = frame1[:,frame_shape[1]//2 - frame_shape[0]//2:frame_shape[1]//2 + frame_shape[0]//2]
-
-        # the BGR image to RGB.
-        frame0 = cv.cvtColor(frame0, cv.COLOR_BGR2RGB)
-        frame1 = cv.cvtColor(frame1, cv.COLOR_BGR2RGB)
-
-        # To improve performance, optionally mark the image as not writeable to
-        # pass by reference.
-        frame0.flags.writeable = False
-        frame1.flags.writeable = False
-        results0 = pose0.process(frame0)
-        results1 = pose1.process(frame1)
-
-        #reverse changes
-        frame0.flags.writeable = True
-        frame1.flags.writeable = True
-        frame0 = cv.cvtColor(frame0, cv.COLOR_RGB2BGR)
-        frame1 = cv.cvtColor(frame1, cv.COLOR_RGB2BGR)
-
-        #check for keypoints detection
-        frame0_keypoints = []
-        if results0.pose_landmarks:
-            for i, landmark in enumerate(results0.pose_landmarks.landmark):
-                if i not in selected_landmarks: continue #only save keypoints that are indicated in pose_keypoints
-                pxl_x = landmark.x * frame0.shape[1]
-                pxl_y = landmark.y * frame0.shape[0]
-                pxl_x = int(round(pxl_x))
-                pxl_y = int(round(pxl_y))
-                cv.circle(frame0,(pxl_x, pxl_y), 3, (0,0,255), -1) #add keypoint detection points into figure
-                kpts = [pxl_x, pxl_y]
-                frame0_keypoints.append(kpts)
-        else:
-            #if no keypoints are found, simply fill the frame data with [-1,-1] for each kpt
-            frame0_keypoints = [[-1, -1]]*len(selected_landmarks)
-
-        frame1_keypoints = []
-        if results1.pose_landmarks:
-            for i, landmark in enumerate(results1.pose_landmarks.landmark):
-                if i not in selected_landmarks: continue
-                pxl_x = landmark.x * frame1.shape[1]
-                pxl_y = landmark.y * frame1.shape[0]
-                pxl_x = int(round(pxl_x))
-                pxl_y = int(round(pxl_y))
-                cv.circle(frame1,(pxl_x, pxl_y), 3, (0,0,255), -1)
-                kpts = [pxl_x, pxl_y]
-                frame1_keypoints.append(kpts)
-
-        else:
-            #if no keypoints are found, simply pose_keypointsfill the frame data with [-1,-1] for each kpt
-            frame1_keypoints = [[-1, -1]]*len(selected_landmarks)
-
-        # Ajouter des labels sur chaque frame
-        cv.putText(frame0, "Camera 0", (10, 30), 
-                   cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        cv.putText(frame1, "Camera 1", (10, 30), 
-                   cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        
-        # Combine both frames side by side.
-        combined_frame = np.hstack((frame0, frame1))
-
-        # Add text to the window.
-        cv.imshow('Combined view - press "q" to quit.', combined_frame)
-
-        k = cv.waitKey(1)
-        if k & 0xFF == 113: break #27 is ESC key.
-
+# Reprojection error (pixels) above which a triangulated joint is marked as not visible.
+max_reprojection_error = 20.0
+
+# Maximum number of frames dropped per displayed set while pairing: past it, the set is displayed
+# unpaired (no triangulation) instead of blocking the window until the cameras fall back in step.
+max_drops_per_tick = 2
+
+
+def load_projection_matrices(camera_count=2):
+    """
+    Loads the rig calibration bundle (memory-mapped, see stereo_calibration), building it from the
+    calibration images c1, c2, ... the first time, or again when the images changed since it was built.
+    Camera 0 is the world origin.
+
+    Parameters:
+    camera_count (int): Number of cameras of the rig.
+
+    Returns:
+    tuple: (intrinsics, P): list of (mtx, dist) per camera and projection matrices (N, 3, 4).
+    """
+    images_folders = [f"c{i + 1}/*.png" for i in range(camera_count)]
+    bundle = load_rig_bundle()
+    if bundle is None or len(bundle['P']) != camera_count or not bundle_is_current(bundle, images_folders):
+        bundle = build_rig_bundle(images_folders)
+
+    return list(zip(bundle['mtx'], bundle['dist'])), bundle['P']
+
+
+def run(input_streams):
+    # Projection matrices, built once.
+    intrinsics, P = load_projection_matrices(len(input_streams))
+
+    # One process per camera: capture and MediaPipe inference run in parallel on separate cores.
+    # Only the keypoints are undistorted ("points" mode): the triangulation expects pinhole coordinates.
+    #crop to 720x720.
+    #Note: camera calibration parameters are set to this resolution.If you change this, make sure to also change camera intrinsic parameters
+    worker_options = {
+        "frame_shape": (frame_shape[0], frame_shape[0], 3),
+        "capture_shape": frame_shape,
+        "min_detection_confidence": 0.5,
+        "min_tracking_confidence": 0.5,
+        "roi": True,
+        # The coordinator triggers the grabs: all the cameras are grabbed back to back on each tick.
+        "triggered": True,
+    }
+    workers = [CameraWorker(stream, mtx, dist, **worker_options).start()
+               for stream, (mtx, dist) in zip(input_streams, intrinsics)]
+    for worker in workers:
+        worker.trigger()
+
+    # Recording state, shared with the single camera key handling ('r' to record, 'q' to quit).
+    state = {
+        "frame_count": 0,
+        "recording": False,
+        "recording_start_time": None,
+    }
+    pTime = 0
+    skew = SkewMeter()
+    # Pairing tolerance: half the measured frame period of camera 0.
+    frame_period = FramePeriod()
+
+    try:
+        while True:
+
+            # Keypoints of every camera (the frames stay in shared memory).
+            results = [worker.get() for worker in workers]
+            if results[0] is not None:
+                frame_period.add(results[0][2])
+
+            # Match the frames by capture timestamp: the oldest frame of an unmatched set is dropped,
+            # at most max_drops_per_tick times before the set is displayed anyway.
+            matched = False
+            drops = 0
+            while all(result is not None for result in results):
+                drop = oldest_unmatched([result[2] for result in results], frame_period.tolerance())
+                if drop is None:
+                    matched = True
+                    break
+                if drops >= max_drops_per_tick: break
+                workers[drop].release(results[drop][0])
+                workers[drop].trigger()
+                results[drop] = workers[drop].get()
+                if drop == 0 and results[0] is not None:
+                    frame_period.add(results[0][2])
+                skew.dropped += 1
+                drops += 1
+
+            if any(result is None for result in results): break
+
+            # Next tick: the workers grab and process the next set while this one is displayed.
+            for worker in workers:
+                worker.trigger()
+
+            frames = [worker.frame(result[0]) for worker, result in zip(workers, results)]
+
+            # Unpaired set (drop limit reached): displayed only, neither triangulated nor recorded.
+            body_array = None
+            if matched:
+                skew.add([result[2] for result in results])
+
+                #if no keypoints are found, the frame data is filled with [-1,-1] for each kpt
+                # Triangulate the 17 joints over the views that see them, weighted by visibility
+                # (units of the calibration chessboard squares, camera 0 frame).
+                keypoints = np.stack([result[3] for result in results])
+                points3d, errors, _ = triangulation.triangulate_views(P, keypoints[..., :2], keypoints[..., 2])
+                visibility = keypoints[..., 2].max(axis=0)
+                body_array = triangulation.body_array(points3d, errors, visibility, max_reprojection_error)
+
+            # Stream the skeleton to the recorder, in the same format as the single camera setup.
+            # Timestamp: capture time of the set (camera 0 clock), relative to the first recorded set.
+            if state["recording"] and body_array is not None:
+                capture_time = results[0][2]
+                if state["recording_start_time"] is None:
+                    state["recording_start_time"] = capture_time
+                elapsed_time = capture_time - state["recording_start_time"]
+                state["writer"].write(pf.blender_bone_array(body_array), state["frame_count"], elapsed_time)
+                state["frame_count"] += 1
+
+            #add keypoint detection points into figure (raw image coordinates)
+            for i, (frame, result) in enumerate(zip(frames, results)):
+                for pxl_x, pxl_y, _ in np.rint(result[4]).astype(int):
+                    if pxl_x < 0: continue
+                    cv.circle(frame,(pxl_x, pxl_y), 3, (0,0,255), -1)
+
+                # Ajouter des labels sur chaque frame
+                cv.putText(frame, f"Camera {i}", (10, 30),
+                           cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+
+            # Frame rate and triangulated joints.
+            cTime = time.time()
+            fps = 1 / (cTime - pTime)
+            pTime = cTime
+            joints = "unsynced" if body_array is None else f"{np.count_nonzero(body_array[:, 3] > 0)}/{len(body_array)}"
+            cv.putText(frames[0], f"FPS: {int(fps)} | 3D joints: {joints}",
+                       (10, 70), cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+            cv.putText(frames[-1], f"Skew: {skew.last * 1000:.1f} ms", (10, 70), cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+            if state["recording"]:
+                cv.putText(frames[-1], "REC", (frames[-1].shape[1] - 80, 30), cv.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+            # Combine the frames side by side, then hand the slots back to the workers.
+            combined_frame = np.hstack(frames)
+            for worker, result in zip(workers, results):
+                worker.release(result[0])
+
+            # Add text to the window.
+            cv.imshow('Combined view - press "r" to record, "q" to quit.', combined_frame)
+
+            k = cv.waitKey(1)
+            if not handle_key(k & 0xFF, state): break
+    finally:
+        for worker in workers:
+            worker.stop()
+
+        # Finish a recording still in progress, even on error or Ctrl+C: the (non-daemon) writer
+        # thread would otherwise keep the interpreter from exiting.
+        if "writer" in state:
+            state.pop("writer").close(wait=True)
 
     cv.destroyAllWindows()
-    for cap in caps:
-        cap.release()
+    print(f"Inter-camera skew: mean {skew.mean() * 1000:.1f} ms (max {skew.max() * 1000:.1f} ms), "
+          f"{skew.dropped} unmatched frames dropped.")
 
 if __name__ == '__main__':
 
     #this will load the sample videos if no camera ID is given
-    input_stream1 = 'media/cam0_test.mp4'
-    input_stream2 = 'media/cam1_test.mp4'
+    input_streams = ['media/cam0_test.mp4', 'media/cam1_test.mp4']
 
-    #put camera id as command line arguements
-    if len(sys.argv) == 3:
-        input_stream1 = int(sys.argv[1])
-        input_stream2 = int(sys.argv[2])
+    #put camera ids as command line arguements (two or more)
+    if len(sys.argv) >= 3:
+        input_streams = [int(arg) for arg in sys.argv[1:]]
 
-    run(input_stream1, input_stream2)
\ No newline at end of file
+    run(input_streams)
@@ -0,0 +1,167 @@
+import numpy as np
+
+"""
+Batched triangulation of keypoints seen by two or more cameras (Direct Linear Transform).
+
+Every point of every frame is solved at once: the DLT systems are stacked into a single
+(M, 2 * N_views, 4) array and solved with one call to np.linalg.svd. Missing keypoints ([-1, -1], as
+returned by PoseTracker.keypoints when nobody is detected) are masked and come out as NaN.
+"""
+
+
+def projection_matrix(camera_matrix, R=None, T=None):
+    """
+    Builds the 3x4 projection matrix P = K [R | T].
+
+    Parameters:
+    camera_matrix (np.ndarray): 3x3 intrinsic matrix of the camera.
+    R (np.ndarray): 3x3 rotation from the world frame to the camera frame (identity if None).
+    T (np.ndarray): Translation from the world frame to the camera frame (zero if None).
+
+    Returns:
+    np.ndarray: 3x4 projection matrix.
+    """
+    R = np.eye(3) if R is None else np.asarray(R, dtype=np.float64)
+    T = np.zeros(3) if T is None else np.asarray(T, dtype=np.float64).reshape(3)
+    return np.asarray(camera_matrix, dtype=np.float64) @ np.column_stack([R, T])
+
+
+def valid_mask(points):
+    """
+    Parameters:
+    points (np.ndarray): Keypoints (..., 2) in pixels.
+
+    Returns:
+    np.ndarray: Boolean mask (...), False for missing keypoints (negative coordinates or NaN).
+    """
+    points = np.asarray(points)
+    return np.all(points >= 0, axis=-1)
+
+
+def project(P, points3d):
+    """
+    Projects 3D points with a projection matrix.
+
+    Parameters:
+    P (np.ndarray): 3x4 projection matrix.
+    points3d (np.ndarray): 3D points (..., 3).
+
+    Returns:
+    np.ndarray: Pixel coordinates (..., 2).
+    """
+    points3d = np.asarray(points3d, dtype=np.float64)
+    projected = points3d @ P[:, :3].T + P[:, 3]
+    return projected[..., :2] / projected[..., 2:3]
+
+
+def triangulate(P1, P2, points1, points2):
+    """
+    Triangulates matching keypoints of two cameras.
+
+    Parameters:
+    P1 (np.ndarray): 3x4 projection matrix of camera 1.
+    P2 (np.ndarray): 3x4 projection matrix of camera 2.
+    points1 (np.ndarray): Keypoints of camera 1, shape (N_frames, N_joints, 2) or any (..., 2).
+    points2 (np.ndarray): Keypoints of camera 2, same shape as points1.
+
+    Returns:
+    tuple: (points3d (..., 3), reprojection_error (...)) where reprojection_error is the mean
+    pixel distance between the keypoints and the reprojected point in both cameras.
+    Missing keypoints in either camera give NaN.
+    """
+    points1 = np.asarray(points1, dtype=np.float64)
+    points2 = np.asarray(points2, dtype=np.float64)
+    if points1.shape != points2.shape or points1.shape[-1] != 2:
+        raise ValueError(f"Keypoint arrays must have the same (..., 2) shape, got {points1.shape} and {points2.shape}")
+
+    points3d, errors, _ = triangulate_views([P1, P2], [points1, points2])
+    return points3d, errors
+
+
+def triangulate_views(projections, points, weights=None, min_views=2):
+    """
+    Weighted least-squares triangulation of keypoints seen by any number of cameras.
+
+    Each view contributes the two DLT rows of a point, scaled by its weight (e.g. the MediaPipe
+    visibility); views with a zero weight or a missing keypoint are ignored. All the points are
+    solved in one stacked SVD of (N_points, 2 * N_views, 4) systems: the cost is linear in the
+    number of cameras.
+
+    Parameters:
+    projections (np.ndarray): 3x4 projection matrices of the cameras, shape (N_views, 3, 4).
+    points (np.ndarray): Keypoints of each camera, shape (N_views, ..., 2).
+    weights (np.ndarray): Weight of each keypoint, shape (N_views, ...). None: all weights are 1.
+    min_views (int): Minimum number of views needed to triangulate a point.
+
+    Returns:
+    tuple: (points3d (..., 3), reprojection_error (...), view_count (...)) where reprojection_error
+    is the weighted mean pixel distance between the keypoints and the reprojected point, and
+    view_count the number of views used. Points seen by fewer than min_views views give NaN.
+    """
+    P = np.asarray(projections, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+    view_total = len(P)
+    if points.shape[0] != view_total or points.shape[-1] != 2:
+        raise ValueError(f"Expected keypoints of shape ({view_total}, ..., 2), got {points.shape}")
+
+    shape = points.shape[1:-1]
+    uv = points.reshape(view_total, -1, 2)
+    if weights is None:
+        w = np.ones(uv.shape[:2])
+    else:
+        w = np.asarray(weights, dtype=np.float64).reshape(view_total, -1)
+    w = np.where(valid_mask(uv) & (w > 0), w, 0.0)
+
+    view_count = np.count_nonzero(w, axis=0)
+    solvable = view_count >= min_views
+
+    points3d = np.full((uv.shape[1], 3), np.nan)
+    errors = np.full(uv.shape[1], np.nan)
+
+    if np.any(solvable):
+        w = w[:, solvable]
+        # Ignored views: zero rows (their coordinates may be -1 or NaN)
+        uv = np.where(w[..., None] > 0, uv[:, solvable], 0.0)
+
+        # Two rows per view: v * P[2] - P[1] and P[0] - u * P[2], scaled by the weight
+        rows_v = uv[..., 1:2] * P[:, None, 2] - P[:, None, 1]
+        rows_u = P[:, None, 0] - uv[..., 0:1] * P[:, None, 2]
+        A = np.concatenate([rows_v * w[..., None], rows_u * w[..., None]]).transpose(1, 0, 2)
+
+        # Solution: right singular vector of the smallest singular value
+        _, _, Vh = np.linalg.svd(A)
+        X = Vh[:, -1]
+        solved = X[:, :3] / X[:, 3:4]
+
+        # Reprojection in every view, averaged over the views used
+        projected = solved @ P[:, :, :3].transpose(0, 2, 1) + P[:, None, :, 3]
+        distances = np.linalg.norm(projected[..., :2] / projected[..., 2:3] - uv, axis=-1)
+
+        points3d[solvable] = solved
+        errors[solvable] = (distances * w).sum(axis=0) / w.sum(axis=0)
+
+    return points3d.reshape(shape + (3,)), errors.reshape(shape), view_count.reshape(shape)
+
+
+def body_array(points3d, errors, visibility, max_error=None):
+    """
+    Packs triangulated joints like the single camera path (x, y, z, visibility), so that they can be
+    passed to positionFunctions.blender_bone_array and recorded.
+
+    Parameters:
+    points3d (np.ndarray): Triangulated points (..., 3), NaN when missing.
+    errors (np.ndarray): Reprojection errors (...) returned by triangulate.
+    visibility (np.ndarray): Visibility of each joint (...), e.g. the minimum over both cameras.
+    max_error (float): Joints with a larger reprojection error (pixels) are marked as not visible.
+
+    Returns:
+    np.ndarray: float32 array (..., 4). Missing joints are at the origin with a zero visibility.
+    """
+    valid = np.isfinite(errors)
+    if max_error is not None:
+        valid &= errors <= max_error
+
+    body = np.zeros(np.shape(errors) + (4,), dtype=np.float32)
+    body[valid, :3] = points3d[valid]
+    body[valid, 3] = np.asarray(visibility)[valid]
+    return body